@@ -1,59 +1,331 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 import openpyxl
 from openpyxl import Workbook
-from langchain_ollama import OllamaLLM
+from ollama_client import KEEP_ALIVE, set_pool_size, warm_up
+from llm_cache import bypass_requested, generation_options, get_cache
 
-# Initialize the Phi4 model
-model = OllamaLLM(model="Phi4", use_cuda=True)
+MODEL_NAME = "Phi4"
 
-# Load the input Excel file
-input_file = "Data4Good_Arolsen_Archives_50k.xlsx"
-output_file = "output.xlsx"
+# Input and output Excel files
+INPUT_FILE = "Data4Good_Arolsen_Archives_50k.xlsx"
+OUTPUT_FILE = "output.xlsx"
 
-wb = openpyxl.load_workbook(input_file)
-sheet = wb.active
+# Extracted rows are appended here as JSON lines; the output workbook
+# is only built from it once extraction is finished
+JOURNAL_FILE = "output.journal.jsonl"
 
-# Prepare the output Excel workbook
-output_wb = Workbook()
-output_sheet = output_wb.active
-output_sheet.title = "Extracted Data"
+# Headers of the output Excel file
+HEADERS = ["ID", "Name", "Surname", "Father", "Mother", "Spouse", "Birthplace", "Nationality", "Religion", "Post War Occupation"]
+DETAIL_COUNT = len(HEADERS) - 1
 
-# Write headers to the output Excel file
-headers = ["ID", "Name", "Surname", "Father", "Mother", "Spouse", "Birthplace", "Nationality", "Religion", "Post War Occupation"]
-output_sheet.append(headers)
+# Requests sent to Ollama at the same time, at most
+MAX_CONCURRENCY = 8
 
-# Iterate through the rows of the input file, starting after the headers
-for row in sheet.iter_rows(min_row=2, values_only=True):
-    print(f"Processing row: {row}")  # Print the current row being processed
-    id_value = row[0]  # Assuming 'ID' is the first column
-    upper_text = row[15]  # Assuming 'Upper' is the second column
-    middle_text = row[16]  # Assuming 'Middle' is the third column
+# Report throughput every PROGRESS_EVERY rows
+PROGRESS_EVERY = 100
 
+
+def build_prompt(upper_text, middle_text):
     # Combine the 'Upper' and 'Middle' columns for context
     context = f"Upper: {upper_text}\nMiddle: {middle_text}"
 
-    # Use the Phi4 model to extract information
-    prompt = (
+    return (
         f"Extract the following details from the provided text strictly in 2 words or less, translated to english. Do not include any word that is not english, just the english translation. "
         f"If you find birthplace, enter as Country. If there is additional information, enter as Town/Country, Region/Country, Provice/Country, etc. Any information is missing, return '-'.\nContext: {context}\n"
         f"Details to extract: Name, Surname, Father, Mother, Spouse, "
         f"Birthplace, Nationality, Religion, Post War Occupation"
     )
 
-    response = model.generate([prompt])
-    response_text = response.generations[0][0].text  # Extract the generated text
 
+def parse_response(response_text):
     # Parse the response and extract the details
     details = response_text.strip().split("\n")
     parsed_details = [detail.split(": ")[-1].strip() for detail in details]
 
     # Ensure all columns are filled, replace any missing or malformed data with '-'
-    if len(parsed_details) < 9:
-        parsed_details += ["-"] * (9 - len(parsed_details))
+    if len(parsed_details) < DETAIL_COUNT:
+        parsed_details += ["-"] * (DETAIL_COUNT - len(parsed_details))
+    return parsed_details
+
+
+def read_rows(sheet):
+    # Iterate through the rows of the input file, starting after the headers
+    # (read-only sheets may drop trailing empty cells)
+    for row in sheet.iter_rows(min_row=2, values_only=True):
+        row = tuple(row) + (None,) * (17 - len(row))
+        id_value = row[0]  # Assuming 'ID' is the first column
+        upper_text = row[15]  # Assuming 'Upper' is the second column
+        middle_text = row[16]  # Assuming 'Middle' is the third column
+        yield id_value, upper_text, middle_text
+
+
+def read_journal(journal_file):
+    """
+    Returns the journal entries and the size of the journal up to the
+    last complete line; a line cut off by a crash is ignored.
+    """
+    entries = []
+    valid_size = 0
+    if not os.path.exists(journal_file):
+        return entries, valid_size
+
+    with open(journal_file, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+            valid_size += len(line)
+    return entries, valid_size
+
+
+def journal_has_entries(journal_file):
+    return os.path.exists(journal_file) and os.path.getsize(journal_file) > 0
+
+
+def open_journal(journal_file, resume, overwrite=False):
+    """
+    Open the journal for appending. When resuming, a partial last line is
+    cut off; otherwise the journal starts empty. A journal that already
+    holds rows is only replaced with overwrite=True, and is then moved
+    aside (with a timestamp suffix) rather than deleted.
+    """
+    if not resume:
+        if journal_has_entries(journal_file):
+            if not overwrite:
+                raise FileExistsError(
+                    f"'{journal_file}' already holds extracted rows; "
+                    f"use --resume to continue it or --overwrite to start over"
+                )
+            backup = f"{journal_file}.{time.strftime('%Y%m%d-%H%M%S')}"
+            os.replace(journal_file, backup)
+            print(f"Moved the previous journal to '{backup}'")
+        return open(journal_file, "w", encoding="utf-8")
+
+    _, valid_size = read_journal(journal_file)
+    journal = open(journal_file, "a", encoding="utf-8")
+    journal.truncate(valid_size)
+    return journal
+
 
-    # Write the data to the output Excel file
-    output_sheet.append([id_value] + parsed_details)
+def write_output(journal_file, output_file):
+    """Build the output workbook from the journal in a single pass."""
+    output_wb = Workbook(write_only=True)
+    output_sheet = output_wb.create_sheet("Extracted Data")
+
+    # Write headers to the output Excel file
+    output_sheet.append(HEADERS)
+
+    entries, _ = read_journal(journal_file)
+    for entry in entries:
+        output_sheet.append([entry["id"]] + entry["details"])
 
-    # Save the output workbook after processing each row
     output_wb.save(output_file)
+    return len(entries)
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that follows the server's latency: it starts at one
+    request and grows by one after every response while latency stays
+    low, up to max_limit. When the smoothed latency climbs above
+    `slowdown` times the baseline (the best smoothed latency seen, slowly
+    drifting towards the current one), the limit is halved, at most once
+    per window of in-flight requests.
+    """
+
+    def __init__(self, max_limit, slowdown=2.0, smoothing=0.2):
+        self.max_limit = max_limit
+        self.slowdown = slowdown
+        self.smoothing = smoothing
+        self.limit = 1
+        self.in_flight = 0
+        self.latency = None
+        self.best_latency = None
+        self.hold = 0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self, latency=None):
+        async with self.condition:
+            self.in_flight -= 1
+            if latency is not None:
+                self._adapt(latency)
+            self.condition.notify_all()
+
+    def _adapt(self, latency):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.smoothing * (latency - self.latency)
+        if self.best_latency is None or self.latency < self.best_latency:
+            self.best_latency = self.latency
+        else:
+            # Let the baseline creep up so one lucky early response
+            # does not pin the limit down for the rest of the run
+            self.best_latency += 0.01 * (self.latency - self.best_latency)
+
+        if self.hold > 0:
+            self.hold -= 1
+        elif self.latency > self.slowdown * self.best_latency:
+            # Back off, then let the requests already sent drain first
+            self.limit = max(1, self.limit // 2)
+            self.hold = self.in_flight
+        elif self.limit < self.max_limit:
+            self.limit += 1
+
+
+async def extract_details(model, limiter, prompt, cache=None):
+    """
+    Send one prompt. The caller already holds a limiter slot, which is
+    released once the request is done. Failed requests are retried by the
+    shared client, with jittered exponential backoff.
+    Responses found in the LLM cache are used without a request.
+    """
+    options = generation_options(model)
+    if cache is not None:
+        response_text = cache.get(model.model, prompt, options)
+        if response_text is not None:
+            await limiter.release()
+            return parse_response(response_text)
+
+    start = time.perf_counter()
+    try:
+        # The shared client is blocking; run it beside the event loop
+        response_text = await asyncio.to_thread(model.generate, prompt)
+    except Exception:
+        await limiter.release()
+        raise
+    await limiter.release(time.perf_counter() - start)
+
+    if cache is not None:
+        cache.put(model.model, prompt, response_text, options)
+    return parse_response(response_text)
+
+
+async def run_extraction(rows, model, on_result, max_concurrency=MAX_CONCURRENCY, cache=None):
+    """
+    Extract the details of every (id, upper, middle) row with up to
+    max_concurrency requests in flight. on_result(id, details) is called
+    in the original row order, as soon as all earlier rows are done.
+
+    If a row fails, the rows before it are still passed to on_result,
+    the requests in flight are cancelled and awaited, and the row's
+    error is raised; --resume then picks up from the failed row.
+    """
+    # Requests run on the loop's default executor: give it a thread per
+    # request slot, so none wait for a thread while the limiter counts
+    # them as in flight (the default has min(32, cpus + 4) threads)
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="extract")
+    )
+    limiter = AdaptiveLimiter(max_concurrency)
+    pending = {}
+    next_index = 0
+
+    def write_ready():
+        nonlocal next_index
+        while next_index in pending and pending[next_index][1].done():
+            id_value, task = pending.pop(next_index)
+            on_result(id_value, task.result())
+            next_index += 1
+
+    try:
+        for index, (id_value, upper_text, middle_text) in enumerate(rows):
+            # Only queue a new row once a request slot is free
+            await limiter.acquire()
+            prompt = build_prompt(upper_text, middle_text)
+            task = asyncio.create_task(extract_details(model, limiter, prompt, cache))
+            pending[index] = (id_value, task)
+            write_ready()
+
+        for index in sorted(pending):
+            if index in pending:
+                await asyncio.wait([pending[index][1]])
+                write_ready()
+    finally:
+        tasks = [task for _, task in pending.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract card details with an Ollama model")
+    parser.add_argument("--input", default=INPUT_FILE)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--journal", default=JOURNAL_FILE)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY, help="maximum requests in flight")
+    parser.add_argument("--resume", action="store_true", help="skip IDs already in the journal")
+    parser.add_argument("--overwrite", action="store_true", help="start over, moving an existing journal aside")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the LLM response cache")
+    parser.add_argument("--keep-alive", default=KEEP_ALIVE, help="how long Ollama keeps the model loaded, e.g. 30m")
+    args = parser.parse_args()
+    if args.resume and args.overwrite:
+        parser.error("--resume and --overwrite cannot be combined")
+    if not args.resume and not args.overwrite and journal_has_entries(args.journal):
+        # Check before loading the model, not after
+        parser.error(f"'{args.journal}' already holds extracted rows; use --resume to continue it or --overwrite to start over")
+
+    # One pooled connection per request in flight, kept alive between rows
+    set_pool_size(args.concurrency)
+
+    # Load the model once up front; it stays loaded between requests
+    model = warm_up(args.model, keep_alive=args.keep_alive)
+
+    # Load the input Excel file
+    wb = openpyxl.load_workbook(args.input, read_only=True)
+    sheet = wb.active
+
+    rows = read_rows(sheet)
+    if args.resume:
+        entries, _ = read_journal(args.journal)
+        done = {str(entry["id"]) for entry in entries}
+        print(f"Resuming: {len(done)} rows already extracted")
+        rows = (row for row in rows if str(row[0]) not in done)
+
+    cache = None if args.no_cache or bypass_requested() else get_cache()
+
+    start = time.perf_counter()
+    processed = 0
+
+    with open_journal(args.journal, args.resume, args.overwrite) as journal:
+
+        def on_result(id_value, details):
+            nonlocal processed
+            # Append the row to the journal
+            journal.write(json.dumps({"id": id_value, "details": details}, default=str) + "\n")
+            journal.flush()
+            processed += 1
+
+            if processed % PROGRESS_EVERY == 0:
+                rate = processed / (time.perf_counter() - start)
+                print(f"Processed {processed} rows ({rate:.2f} rows/s)")
+
+        asyncio.run(run_extraction(rows, model, on_result, args.concurrency, cache))
+
+    wb.close()
+    elapsed = time.perf_counter() - start
+    print(f"{processed} rows in {elapsed:.1f}s ({processed / max(elapsed, 1e-9):.2f} rows/s)")
+    print(model.timing_stats())
+    if cache is not None:
+        print(cache.stats())
+
+    total = write_output(args.journal, args.output)
+    print(f"Data has been extracted and saved to {args.output} ({total} rows).")
+
 
-print(f"Data has been extracted and saved to {output_file}.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,20 @@
+import argparse
+import os
+import re
+import sys
+import numpy as np
+import openpyxl
 import pandas as pd
-from typing import Dict, List
+from pandas.io.parsers import TextParser
+from typing import Dict, Iterator, List, Tuple
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
+from data_cache import cache_file, load_table
 
 
-@dataclass
+@dataclass(slots=True)
 class Anomaly:
     field: str
     value: str
@@ -12,7 +23,179 @@ class Anomaly:
     suggestions: List[str] = None
 
 
+class AnomalyTable(Mapping):
+    """
+    Columnar store of anomalies: one row per anomaly with the columns
+    TD, field, value, issue_type and confidence, where field and
+    issue_type are categorical. Rows of the same TD are contiguous, so
+    the table also reads as a TD -> List[Anomaly] mapping with O(1)
+    lookups, building Anomaly objects only for the TDs asked for.
+    """
+
+    COLUMNS = ["TD", "field", "value", "issue_type", "confidence"]
+
+    def __init__(self, frame: pd.DataFrame):
+        frame = frame[self.COLUMNS].astype(
+            {
+                "TD": object,
+                "field": "category",
+                "value": object,
+                "issue_type": "category",
+                "confidence": float,
+            }
+        )
+        # Group rows by TD, in order of first appearance
+        codes = pd.factorize(frame["TD"])[0]
+        if len(codes) and (np.diff(codes) < 0).any():
+            frame = frame.iloc[np.argsort(codes, kind="stable")]
+        self.frame = frame.reset_index(drop=True)
+        self._spans = None
+
+    @classmethod
+    def from_anomaly_frame(cls, frame: pd.DataFrame) -> "AnomalyTable":
+        """
+        Build the table from HolocaustRecordValidator.anomaly_frame
+        output. A TD with several records keeps its first position but
+        the last record's anomalies, as if assigned into a dict row by
+        row.
+        """
+        starts, ends = _record_runs(frame["row"].to_numpy())
+        tds = frame["TD"].to_numpy(dtype=object)[starts]
+        if pd.Series(tds).duplicated().any():
+            runs = {}
+            for td, start, end in zip(tds, starts, ends):
+                runs[td] = (start, end)
+            order = np.concatenate([np.arange(s, e) for s, e in runs.values()])
+            frame = frame.iloc[order]
+        return cls(frame)
+
+    @classmethod
+    def from_dict(
+        cls, anomalies_by_td: Dict[str, List[Anomaly]]
+    ) -> "AnomalyTable":
+        rows = [
+            (td, a.field, a.value, a.issue_type, a.confidence)
+            for td, anomalies in anomalies_by_td.items()
+            for a in anomalies
+        ]
+        return cls(pd.DataFrame(rows, columns=cls.COLUMNS))
+
+    @classmethod
+    def from_report(cls, report_df: pd.DataFrame) -> "AnomalyTable":
+        """Read back a report written by create_anomaly_report."""
+        confidence = report_df["Confidence"]
+        if not pd.api.types.is_numeric_dtype(confidence):
+            confidence = (
+                confidence.astype(str).str.rstrip("%").astype(float) / 100
+            )
+        return cls(
+            pd.DataFrame(
+                {
+                    "TD": report_df["TD"].map(str),
+                    "field": report_df["Field"],
+                    # Empty values come back from Excel/CSV as NaN
+                    "value": report_df["Current Value"].fillna("").map(str),
+                    "issue_type": report_df["Issue Type"],
+                    "confidence": confidence,
+                }
+            )
+        )
+
+    @property
+    def n_anomalies(self) -> int:
+        return len(self.frame)
+
+    def _td_spans(self) -> Dict[str, Tuple[int, int]]:
+        if self._spans is None:
+            td = self.frame["TD"].to_numpy(dtype=object)
+            starts, ends = _record_runs(td)
+            self._spans = dict(
+                zip(td[starts].tolist(), zip(starts.tolist(), ends.tolist()))
+            )
+        return self._spans
+
+    def __getitem__(self, td: str) -> List[Anomaly]:
+        start, end = self._td_spans()[td]
+        return _to_anomalies(self.frame.iloc[start:end])
+
+    def __contains__(self, td) -> bool:
+        return td in self._td_spans()
+
+    def __iter__(self):
+        return iter(self._td_spans())
+
+    def __len__(self) -> int:
+        return len(self._td_spans())
+
+    def items(self) -> Iterator[Tuple[str, List[Anomaly]]]:
+        anomalies = _to_anomalies(self.frame)
+        for td, (start, end) in self._td_spans().items():
+            yield td, anomalies[start:end]
+
+    def with_issue_type(self, issue_type: str) -> "AnomalyTable":
+        """Sub-table of the anomalies of one issue type."""
+        return AnomalyTable(
+            self.frame[self.frame["issue_type"] == issue_type]
+        )
+
+    def field_counts(self) -> Dict[str, int]:
+        return _category_counts(self.frame["field"])
+
+    def issue_counts(self) -> Dict[str, int]:
+        return _category_counts(self.frame["issue_type"])
+
+
+def _record_runs(keys: np.ndarray):
+    """Start and end positions of the runs of equal consecutive keys."""
+    if not len(keys):
+        empty = np.array([], dtype=np.int64)
+        return empty, empty
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)]
+    return starts, ends
+
+
+def _to_anomalies(frame: pd.DataFrame) -> List[Anomaly]:
+    records = zip(
+        frame["field"].tolist(),
+        frame["value"].tolist(),
+        frame["issue_type"].tolist(),
+        frame["confidence"].tolist(),
+    )
+    return [
+        Anomaly(field=f, value=v, issue_type=t, confidence=c)
+        for f, v, t, c in records
+    ]
+
+
+def _category_counts(column: pd.Series) -> Dict[str, int]:
+    counts = column.value_counts(sort=True)
+    return {str(k): int(v) for k, v in counts.items() if v}
+
+
+# Columns read by the validation rules
+VALIDATED_COLUMNS = [
+    "TD",
+    "Automatic Validation",
+    "Overall Confidence OCR",
+    "Last_Name",
+    "First Name",
+    "Nationality",
+    "Birthdate (Geb)",
+    "Religion",
+    "Birth Place",
+]
+
+
+# Rows validated at a time by stream_database
+STREAM_BATCH_SIZE = 10_000
+
+
 class HolocaustRecordValidator:
+    # Bump whenever a rule or a list of valid values changes, so that
+    # incremental runs revalidate every record
+    VERSION = 2
+
     def __init__(self):
         # OCR thresholds
         self.MIN_OCR_CONFIDENCE = 75.0
@@ -72,6 +255,16 @@ class HolocaustRecordValidator:
             "Buddhist",
             "Other",
         }
+        self._valid_religions_lower = {r.lower() for r in self.valid_religions}
+
+        # Last names carrying a maiden name ('geb' = geboren)
+        self.maiden_name_indicators = [
+            "geb",
+            "geb.",
+            "geboren",
+            "nee",
+            "née",
+        ]
 
     def validate_record(self, record: pd.Series) -> List[Anomaly]:
         anomalies = []
@@ -99,7 +292,8 @@ class HolocaustRecordValidator:
                     field="OCR_Confidence",
                     value=str(ocr_confidence),
                     issue_type="low_confidence",
-                    confidence=ocr_confidence,
+                    # OCR confidence is a percentage; anomalies use 0-1
+                    confidence=ocr_confidence / 100,
                 )
             )
         return anomalies
@@ -174,16 +368,9 @@ class HolocaustRecordValidator:
                     )
 
                 # Check for maiden name indicators
-                maiden_name_indicators = [
-                    "geb",
-                    "geb.",
-                    "geboren",
-                    "nee",
-                    "née",
-                ]
                 if any(
                     indicator in last_name.lower()
-                    for indicator in maiden_name_indicators
+                    for indicator in self.maiden_name_indicators
                 ):
                     # This is not an error, but should be noted for processing
                     anomalies.append(
@@ -335,9 +522,7 @@ class HolocaustRecordValidator:
         if pd.notna(record["Religion"]):
             religion = str(record["Religion"]).strip()
             # Convert both the input and valid religions to lowercase for comparison
-            if religion.lower() not in {
-                r.lower() for r in self.valid_religions
-            }:
+            if religion.lower() not in self._valid_religions_lower:
                 anomalies.append(
                     Anomaly(
                         field="Religion",
@@ -361,13 +546,333 @@ class HolocaustRecordValidator:
             )
         return anomalies
 
+    # ------------------------------------------------------------------
+    # Column-wise validation
+    #
+    # Each rule below mirrors one check of the per-row path above, but is
+    # evaluated as a boolean mask over a whole column. A rule returns a
+    # "hit" tuple (mask, field, value, issue_type, confidence) where value
+    # and confidence are either scalars or Series aligned to the frame.
+    # ------------------------------------------------------------------
+
+    def validate_dataframe(self, df: pd.DataFrame) -> "AnomalyTable":
+        """
+        Validate every record of the DataFrame at once.
+        Returns an AnomalyTable holding the same TD -> anomalies mapping
+        as calling validate_record on each row.
+        """
+        return AnomalyTable.from_anomaly_frame(self.anomaly_frame(df))
+
+    def anomaly_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Run every rule over the DataFrame and return one row per anomaly
+        with the columns row, TD, field, value, issue_type and confidence.
+        'row' is the positional index of the record; anomalies are ordered
+        by row and then in the order validate_record would report them.
+        """
+        df = df.reset_index(drop=True)
+
+        hits = []
+        hits.extend(self._check_ocr_confidence_frame(df))
+        hits.extend(self._validate_names_frame(df))
+        hits.extend(self._validate_nationality_frame(df))
+        hits.extend(self._validate_dates_frame(df))
+        hits.extend(self._validate_religion_frame(df))
+        hits.extend(self._validate_location_frame(df))
+
+        parts = []
+        for rule, (mask, field, value, issue_type, confidence) in enumerate(
+            hits
+        ):
+            mask = mask.to_numpy(dtype=bool)
+            rows = np.flatnonzero(mask)
+            if not len(rows):
+                continue
+            parts.append(
+                pd.DataFrame(
+                    {
+                        "row": rows,
+                        "rule": rule,
+                        "field": field,
+                        "value": _take(value, mask),
+                        "issue_type": issue_type,
+                        "confidence": _take(confidence, mask),
+                    }
+                )
+            )
+
+        if not parts:
+            return pd.DataFrame(
+                {
+                    "row": np.array([], dtype=np.int64),
+                    "TD": pd.Series([], dtype=object),
+                    "field": pd.Series([], dtype=object),
+                    "value": pd.Series([], dtype=object),
+                    "issue_type": pd.Series([], dtype=object),
+                    "confidence": np.array([], dtype=float),
+                }
+            )
+
+        frame = pd.concat(parts, ignore_index=True)
+        frame = frame.sort_values(["row", "rule"], kind="stable")
+        frame.insert(
+            1, "TD", df["TD"].map(str).to_numpy(dtype=object)[frame["row"]]
+        )
+        return frame.drop(columns="rule").reset_index(drop=True)
+
+    def _check_ocr_confidence_frame(self, df):
+        to_validate = df["Automatic Validation"] == "To be validated"
+        ocr_confidence = (
+            df.loc[to_validate, "Overall Confidence OCR"]
+            .astype(float)
+            .reindex(df.index)
+        )
+        return [
+            (
+                ocr_confidence < self.MIN_OCR_CONFIDENCE,
+                "OCR_Confidence",
+                ocr_confidence.map(str, na_action="ignore"),
+                "low_confidence",
+                ocr_confidence / 100,
+            )
+        ]
+
+    def _validate_names_frame(self, df):
+        hits = []
+        suspicious = _char_class(self.suspicious_chars)
+        maiden = "|".join(re.escape(i) for i in self.maiden_name_indicators)
+
+        # Last Name
+        present, last_name = _stripped(df["Last_Name"])
+        empty = present & (last_name == "")
+        filled = present & ~empty
+        hits.append((empty, "Last_Name", "", "empty_required_field", 1.0))
+        for mask, issue_type, confidence in [
+            (~_str_test(last_name.str.isupper()), "not_capitalized", 0.8),
+            (
+                _str_test(last_name.str.contains(_digit_class())),
+                "contains_numbers",
+                0.9,
+            ),
+            (
+                _str_test(last_name.str.contains(suspicious)),
+                "suspicious_characters",
+                0.9,
+            ),
+            (last_name.str.len() < 2, "too_short", 0.9),
+            (
+                _str_test(last_name.str.lower().str.contains(maiden)),
+                "contains_maiden_name_indicator",
+                0.7,
+            ),
+        ]:
+            hits.append(
+                (filled & mask, "Last_Name", last_name, issue_type, confidence)
+            )
+        hits.append((~present, "Last_Name", "", "missing_required_field", 1.0))
+
+        # First Name
+        present, first_name = _stripped(df["First Name"])
+        empty = present & (first_name == "")
+        filled = present & ~empty
+        hits.append((empty, "First Name", "", "empty_required_field", 1.0))
+        for mask, issue_type in [
+            (
+                _str_test(first_name.str.contains(_digit_class())),
+                "contains_numbers",
+            ),
+            (
+                _str_test(first_name.str.contains(suspicious)),
+                "suspicious_characters",
+            ),
+        ]:
+            hits.append(
+                (filled & mask, "First Name", first_name, issue_type, 0.9)
+            )
+        hits.append(
+            (~present, "First Name", "", "missing_required_field", 1.0)
+        )
+
+        return hits
+
+    def _validate_nationality_frame(self, df):
+        present, nat = _stripped(df["Nationality"])
+        nat = nat.str.lower()
+        undeclared = present & (nat == "-")
+        invalid = present & ~undeclared & ~nat.isin(self.valid_nationalities)
+        return [
+            (undeclared, "Nationality", nat, "undeclared_nationality", 1.0),
+            (invalid, "Nationality", nat, "invalid_nationality", 0.7),
+        ]
+
+    def _validate_dates_frame(self, df):
+        present, birth_date = _stripped(df["Birthdate (Geb)"])
+        # Empty, "//" and partial dates like "//1885" are all skipped
+        checked = (
+            present
+            & ~_str_test(birth_date.str.startswith("//"))
+            & (birth_date != "")
+            & _str_test(birth_date.str.contains("/", regex=False))
+        )
+
+        dates = pd.to_datetime(
+            birth_date.where(checked),
+            format="%d/%m/%Y",
+            dayfirst=True,
+            errors="coerce",
+        )
+        parsed = checked & dates.notna()
+        out_of_range = parsed & (
+            (dates.dt.year < 1800) | (dates.dt.year > 1950)
+        )
+        # Only flag completely unparseable dates
+        unparseable = checked & ~parsed & (birth_date.str.count("/") != 2)
+
+        return [
+            (
+                out_of_range | unparseable,
+                "Birthdate",
+                birth_date,
+                "invalid_format",
+                0.95,
+            )
+        ]
+
+    def _validate_religion_frame(self, df):
+        present, religion = _stripped(df["Religion"])
+        unknown = present & ~religion.str.lower().isin(
+            self._valid_religions_lower
+        )
+        return [
+            (
+                unknown,
+                "Religion",
+                df["Religion"].map(str, na_action="ignore"),
+                "unknown_religion",
+                0.8,
+            )
+        ]
+
+    def _validate_location_frame(self, df):
+        return [
+            (
+                df["Birth Place"].isna(),
+                "Birth Place",
+                "",
+                "missing_required_field",
+                1.0,
+            )
+        ]
+
+
+def iter_record_anomalies(
+    frame: pd.DataFrame,
+) -> Iterator[Tuple[str, List[Anomaly]]]:
+    """Yield (TD, anomalies) for each record of an anomaly frame."""
+    anomalies = _to_anomalies(frame)
+    td_keys = frame["TD"].tolist()
+
+    # Rows are sorted, so each record's anomalies form a contiguous run
+    starts, ends = _record_runs(frame["row"].to_numpy())
+    for start, end in zip(starts, ends):
+        yield td_keys[start], anomalies[start:end]
+
+
+def _validate_shard(shard: pd.DataFrame) -> pd.DataFrame:
+    """Worker entry point: validate one shard of the database."""
+    return HolocaustRecordValidator().anomaly_frame(shard)
+
+
+def validate_in_parallel(df: pd.DataFrame, workers: int) -> AnomalyTable:
+    """
+    Split the DataFrame into contiguous row ranges and validate them in a
+    process pool. Shards are merged in order, so the result is identical
+    to a serial validate_dataframe run.
+    """
+    return AnomalyTable.from_anomaly_frame(parallel_anomaly_frame(df, workers))
+
+
+def parallel_anomaly_frame(df: pd.DataFrame, workers: int) -> pd.DataFrame:
+    """anomaly_frame computed shard by shard in a process pool."""
+    # Only ship the columns the rules look at
+    df = df[VALIDATED_COLUMNS].reset_index(drop=True)
+    bounds = np.linspace(0, len(df), workers + 1).astype(int)
+    ranges = [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+    # The slices are views; the executor pickles each one only when it
+    # hands it to a worker, so the first shard starts right away
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_validate_shard, df.iloc[start:stop])
+            for start, stop in ranges
+        ]
+        frames = [future.result() for future in futures]
+
+    for (start, _), frame in zip(ranges, frames):
+        frame["row"] += start
+
+    if not frames:
+        return HolocaustRecordValidator().anomaly_frame(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _stripped(column: pd.Series):
+    """
+    Returns (present, text): a mask of non-null cells and the stripped
+    string form of each present cell (NaN elsewhere).
+    """
+    present = column.notna()
+    text = column[present].map(str).str.strip().reindex(column.index)
+    return present, text.astype(object)
+
+
+def _str_test(result: pd.Series) -> pd.Series:
+    """Turn the result of a .str predicate into a plain mask (NaN -> False)."""
+    return result.astype(object).fillna(False).astype(bool)
+
+
+def _take(value, mask: np.ndarray) -> list:
+    """Values of a hit at the masked rows; scalars are broadcast."""
+    if isinstance(value, pd.Series):
+        return value.to_numpy(dtype=object)[mask].tolist()
+    return [value] * int(mask.sum())
+
+
+def _char_class(chars) -> str:
+    return "[" + "".join(re.escape(c) for c in sorted(chars)) + "]"
+
+
+@lru_cache(maxsize=None)
+def _digit_class() -> str:
+    """
+    Regex character class for exactly the characters str.isdigit() accepts,
+    which is wider than \\d (e.g. superscripts).
+    """
+    return _char_class(
+        chr(c) for c in range(sys.maxunicode + 1) if chr(c).isdigit()
+    )
 
-def process_database(file_path: str) -> Dict[str, List[Anomaly]]:
+
+def process_database(
+    file_path: str, vectorized: bool = True, workers: int = 1
+) -> AnomalyTable:
     """
-    Process entire database and return anomalies by TD number
+    Process entire database and return anomalies by TD number.
+    By default the rules are applied column-wise (validate_dataframe);
+    pass vectorized=False to validate record by record, or workers > 1
+    to split the column-wise validation across processes. The record by
+    record rules only run serially.
     """
+    if workers > 1 and not vectorized:
+        raise ValueError("workers > 1 requires vectorized=True")
+
     validator = HolocaustRecordValidator()
-    df = pd.read_excel(file_path)
+    df = load_table(file_path, columns=VALIDATED_COLUMNS)
+
+    if workers > 1:
+        return validate_in_parallel(df, workers)
+    if vectorized:
+        return validator.validate_dataframe(df)
 
     anomalies_by_td = {}
     for _, record in df.iterrows():
@@ -375,55 +880,374 @@ def process_database(file_path: str) -> Dict[str, List[Anomaly]]:
         if anomalies:
             anomalies_by_td[str(record["TD"])] = anomalies
 
-    return anomalies_by_td
+    return AnomalyTable.from_dict(anomalies_by_td)
+
+
+def process_database_incremental(
+    file_path: str, store_path: str = None, workers: int = 1
+) -> AnomalyTable:
+    """
+    Like process_database, but only revalidates records that changed
+    since the last incremental run.
+
+    Each record is fingerprinted by hashing its validated columns and
+    keyed by (TD, occurrence of that TD). Records whose fingerprint is
+    unchanged reuse the anomalies stored by the previous run; records
+    no longer in the source are dropped from the store. The whole
+    store is discarded when the validator version changes.
+    """
+    if store_path is None:
+        store_path = cache_file(file_path, "_fingerprints.pkl")
+
+    df = load_table(file_path, columns=VALIDATED_COLUMNS)
+    df = df.reset_index(drop=True)
+
+    keys = pd.DataFrame({"TD": df["TD"].map(str)})
+    keys["occurrence"] = keys.groupby("TD").cumcount()
+    keys["fingerprint"] = pd.util.hash_pandas_object(df, index=False).values
+    key_index = pd.MultiIndex.from_frame(keys[["TD", "occurrence"]])
+
+    store = _load_fingerprint_store(store_path)
+    old_keys = store["fingerprints"]
+    old_fingerprints = pd.Series(
+        old_keys["fingerprint"].values,
+        index=pd.MultiIndex.from_frame(old_keys[["TD", "occurrence"]]),
+    ).reindex(key_index, fill_value=0)
+    unchanged = (
+        old_fingerprints.to_numpy() == keys["fingerprint"].to_numpy()
+    )
+
+    # Validate the new and changed records
+    changed_rows = np.flatnonzero(~unchanged)
+    changed_df = df.iloc[changed_rows]
+    if workers > 1:
+        fresh = parallel_anomaly_frame(changed_df, workers)
+    else:
+        fresh = HolocaustRecordValidator().anomaly_frame(changed_df)
+    fresh["row"] = changed_rows[fresh["row"].to_numpy()]
+
+    # Reuse stored anomalies of the unchanged records
+    row_of = pd.Series(np.flatnonzero(unchanged), index=key_index[unchanged])
+    reused = store["anomalies"]
+    reused_index = pd.MultiIndex.from_frame(reused[["TD", "occurrence"]])
+    reused = reused[reused_index.isin(row_of.index)].copy()
+    reused["row"] = row_of.reindex(
+        pd.MultiIndex.from_frame(reused[["TD", "occurrence"]])
+    ).to_numpy()
+
+    # Each record comes from one source only, so a stable sort by row
+    # keeps every record's anomalies in their original order
+    frame = pd.concat(
+        [fresh, reused.drop(columns="occurrence")], ignore_index=True
+    )
+    frame["row"] = frame["row"].astype(np.int64)
+    frame = frame.sort_values("row", kind="stable").reset_index(drop=True)
+
+    stored = frame.drop(columns="row")
+    stored.insert(
+        1, "occurrence", keys["occurrence"].to_numpy()[frame["row"]]
+    )
+    _save_fingerprint_store(store_path, keys, stored)
+
+    print(
+        f"Revalidated {len(changed_rows)} records, "
+        f"skipped {int(unchanged.sum())} unchanged records"
+    )
+    return AnomalyTable.from_anomaly_frame(frame)
+
+
+def _load_fingerprint_store(store_path: str) -> dict:
+    empty = {
+        "fingerprints": pd.DataFrame(
+            {
+                "TD": pd.Series([], dtype=object),
+                "occurrence": np.array([], dtype=np.int64),
+                "fingerprint": np.array([], dtype=np.uint64),
+            }
+        ),
+        "anomalies": pd.DataFrame(
+            columns=[
+                "TD",
+                "occurrence",
+                "field",
+                "value",
+                "issue_type",
+                "confidence",
+            ]
+        ),
+    }
+    if not os.path.exists(store_path):
+        return empty
+
+    store = pd.read_pickle(store_path)
+    if store.get("version") != HolocaustRecordValidator.VERSION:
+        print("Validator version changed, revalidating every record")
+        return empty
+    return store
+
+
+def _save_fingerprint_store(
+    store_path: str, keys: pd.DataFrame, anomalies: pd.DataFrame
+):
+    os.makedirs(os.path.dirname(os.path.abspath(store_path)), exist_ok=True)
+    tmp_path = store_path + ".tmp"
+    pd.to_pickle(
+        {
+            "version": HolocaustRecordValidator.VERSION,
+            "fingerprints": keys,
+            "anomalies": anomalies,
+        },
+        tmp_path,
+    )
+    os.replace(tmp_path, store_path)
+
+
+def stream_database(
+    file_path: str, batch_size: int = STREAM_BATCH_SIZE
+) -> Iterator[Tuple[str, List[Anomaly]]]:
+    """
+    Validate the workbook in fixed-size row batches, yielding
+    (TD, anomalies) for each record with issues as soon as its batch is
+    done. The sheet is read in openpyxl read-only mode and only the
+    validated columns of one batch are held in memory at a time.
+    Records sharing a TD are yielded separately.
+    """
+    validator = HolocaustRecordValidator()
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        positions = _column_positions(header, VALIDATED_COLUMNS)
+
+        batch = []
+        for row in rows:
+            batch.append([_cell_value(row, i) for i in positions])
+            if len(batch) == batch_size:
+                yield from _validate_batch(validator, batch)
+                batch = []
+        if batch:
+            yield from _validate_batch(validator, batch)
+    finally:
+        wb.close()
+
+
+def _column_positions(header, columns: List[str]) -> List[int]:
+    names = list(header)
+    missing = [c for c in columns if c not in names]
+    if missing:
+        raise KeyError(f"Columns not found in sheet: {missing}")
+    return [names.index(c) for c in columns]
+
+
+def _cell_value(row, position: int):
+    """Cell conversion used by pandas' openpyxl reader."""
+    value = row[position] if position < len(row) else None
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _validate_batch(validator, batch):
+    # TextParser applies read_excel's NA values. Cells keep the type
+    # openpyxl gave them: inferring column dtypes per batch would make
+    # e.g. str(5) vs str(5.0) depend on which batch a row landed in.
+    df = TextParser(
+        batch, header=None, names=VALIDATED_COLUMNS, dtype=object
+    ).read()
+    return iter_record_anomalies(validator.anomaly_frame(df))
 
 
 def create_anomaly_report(
-    anomalies_by_td: Dict[str, List[Anomaly]], output_file: str
+    anomalies_by_td: AnomalyTable,
+    output_file: str,
+    batch_size: int = STREAM_BATCH_SIZE,
 ):
     """
-    Create detailed Excel report of all anomalies
+    Create detailed report of all anomalies. The format follows the
+    file extension: .xlsx, .csv or .parquet. Confidence is written as a
+    number between 0 and 1 (for low_confidence anomalies, the record's
+    OCR confidence as a fraction).
+
+    Accepts an AnomalyTable, written in bulk from its columns, or any
+    iterable of (TD, anomalies) pairs such as stream_database(), which
+    is written in batches of batch_size anomalies as it arrives.
     """
-    # Prepare data for DataFrame
-    report_data = []
+    extension = os.path.splitext(output_file)[1].lower()
+    if extension not in REPORT_WRITERS:
+        raise ValueError(f"Unsupported report format: '{extension}'")
 
-    for td, anomalies in anomalies_by_td.items():
-        for field, field_anomalies in anomalies.items():
-            for anomaly in field_anomalies:
-                report_data.append(
-                    {
-                        "TD": td,
-                        "Field": field,
-                        "Current Value": anomaly.value,
-                        "Issue Type": anomaly.issue_type,
-                        "Confidence": f"{anomaly.confidence * 100:.1f}%",
-                    }
+    writer = REPORT_WRITERS[extension](output_file)
+    try:
+        for batch in _report_batches(anomalies_by_td, batch_size):
+            writer.write(batch)
+    finally:
+        writer.close()
+
+
+def read_anomaly_report(file_path: str) -> pd.DataFrame:
+    """Load a report written by create_anomaly_report, in any format."""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".csv":
+        return pd.read_csv(file_path, dtype={"TD": str, "Current Value": str})
+    if extension == ".parquet":
+        return pd.read_parquet(file_path)
+    return load_table(file_path)
+
+
+REPORT_COLUMNS = ["TD", "Field", "Current Value", "Issue Type", "Confidence"]
+
+
+def _report_batches(anomalies_by_td, batch_size: int):
+    if isinstance(anomalies_by_td, AnomalyTable):
+        frame = anomalies_by_td.frame
+        yield pd.DataFrame(
+            {
+                "TD": frame["TD"].astype(object),
+                "Field": frame["field"].astype(str).astype(object),
+                "Current Value": frame["value"].astype(object),
+                "Issue Type": frame["issue_type"].astype(str).astype(object),
+                "Confidence": frame["confidence"],
+            }
+        )
+        return
+
+    rows = []
+    for td, anomalies in anomalies_by_td:
+        for anomaly in anomalies:
+            rows.append(
+                (
+                    td,
+                    anomaly.field,
+                    anomaly.value,
+                    anomaly.issue_type,
+                    float(anomaly.confidence),
                 )
+            )
+        if len(rows) >= batch_size:
+            yield pd.DataFrame(rows, columns=REPORT_COLUMNS)
+            rows = []
+    if rows:
+        yield pd.DataFrame(rows, columns=REPORT_COLUMNS)
+
+
+class _XlsxReportWriter:
+    """Write-only workbook: rows are streamed to disk, not kept as cells."""
+
+    def __init__(self, output_file: str):
+        self.output_file = output_file
+        self.wb = openpyxl.Workbook(write_only=True)
+        self.sheet = self.wb.create_sheet("Anomalies")
+        self.sheet.append(REPORT_COLUMNS)
+
+    def write(self, batch: pd.DataFrame):
+        columns = [batch[c].tolist() for c in REPORT_COLUMNS]
+        for row in zip(*columns):
+            self.sheet.append(row)
+
+    def close(self):
+        self.wb.save(self.output_file)
+
+
+class _CsvReportWriter:
+    def __init__(self, output_file: str):
+        self.file = open(output_file, "w", newline="", encoding="utf-8")
+        self.header = True
+
+    def write(self, batch: pd.DataFrame):
+        batch.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        if self.header:
+            self.write(pd.DataFrame(columns=REPORT_COLUMNS))
+        self.file.close()
+
+
+class _ParquetReportWriter:
+    def __init__(self, output_file: str):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.schema = pa.schema(
+            [
+                ("TD", pa.string()),
+                ("Field", pa.string()),
+                ("Current Value", pa.string()),
+                ("Issue Type", pa.string()),
+                ("Confidence", pa.float64()),
+            ]
+        )
+        self.writer = pq.ParquetWriter(output_file, self.schema)
+
+    def write(self, batch: pd.DataFrame):
+        import pyarrow as pa
+
+        self.writer.write_table(
+            pa.Table.from_pandas(
+                batch, schema=self.schema, preserve_index=False
+            )
+        )
+
+    def close(self):
+        self.writer.close()
 
-    # Create DataFrame and save to Excel
-    report_df = pd.DataFrame(report_data)
-    report_df.to_excel(output_file, index=False)
 
+REPORT_WRITERS = {
+    ".xlsx": _XlsxReportWriter,
+    ".csv": _CsvReportWriter,
+    ".parquet": _ParquetReportWriter,
+}
 
-def print_summary_stats(anomalies_by_td: Dict[str, List[Anomaly]]):
+
+def new_summary_counts() -> dict:
+    return {
+        "records": 0,
+        "anomalies": 0,
+        "fields": {},
+        "issues": {},
+    }
+
+
+def tally_anomalies(anomalies_by_td, counts: dict):
+    """
+    Pass (TD, anomalies) pairs through unchanged while adding them to
+    the summary counts, so a stream can be reported and summarized in
+    a single pass.
+    """
+    for td, anomalies in anomalies_by_td:
+        counts["records"] += 1
+        counts["anomalies"] += len(anomalies)
+        for anomaly in anomalies:
+            counts["issues"][anomaly.issue_type] = (
+                counts["issues"].get(anomaly.issue_type, 0) + 1
+            )
+            counts["fields"][anomaly.field] = (
+                counts["fields"].get(anomaly.field, 0) + 1
+            )
+        yield td, anomalies
+
+
+def print_summary_stats(anomalies_by_td: AnomalyTable):
     """
     Print summary statistics of the anomaly detection
     """
-    total_records = len(anomalies_by_td)
-    total_anomalies = sum(
-        len(anomalies) for anomalies in anomalies_by_td.values()
+    print_summary_counts(
+        {
+            "records": len(anomalies_by_td),
+            "anomalies": anomalies_by_td.n_anomalies,
+            "fields": anomalies_by_td.field_counts(),
+            "issues": anomalies_by_td.issue_counts(),
+        }
     )
 
-    # Count issues by type
-    issue_counts = {}
-    field_counts = {}
 
-    for anomalies in anomalies_by_td.values():
-        for anomaly in anomalies:
-            issue_counts[anomaly.issue_type] = (
-                issue_counts.get(anomaly.issue_type, 0) + 1
-            )
-            field_counts[anomaly.field] = field_counts.get(anomaly.field, 0) + 1
+def print_summary_counts(counts: dict):
+    total_records = counts["records"]
+    total_anomalies = counts["anomalies"]
 
     print("\nANOMALY DETECTION SUMMARY")
     print("========================")
@@ -434,25 +1258,70 @@ def print_summary_stats(anomalies_by_td: Dict[str, List[Anomaly]]):
     print("\nIssues by Field:")
     print("--------------")
     for field, count in sorted(
-        field_counts.items(), key=lambda x: x[1], reverse=True
+        counts["fields"].items(), key=lambda x: x[1], reverse=True
     ):
         print(f"{field}: {count}")
 
     print("\nIssues by Type:")
     print("-------------")
     for issue_type, count in sorted(
-        issue_counts.items(), key=lambda x: x[1], reverse=True
+        counts["issues"].items(), key=lambda x: x[1], reverse=True
     ):
         print(f"{issue_type}: {count}")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Detect record anomalies")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of processes used for validation",
+    )
+    parser.add_argument(
+        "--report",
+        default="anomaly_report.xlsx",
+        help="report file (.xlsx, .csv or .parquet)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only revalidate records changed since the last run",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="validate the sheet in bounded-memory batches",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=STREAM_BATCH_SIZE,
+        help="rows per batch in --stream mode",
+    )
+    args = parser.parse_args()
+
     try:
         print("Processing database...")
-        anomalies = process_database("data.xlsx")
+        output_file = args.report
+
+        if args.stream:
+            # Validate, report and summarize in one pass over the sheet
+            counts = new_summary_counts()
+            stream = stream_database("data.xlsx", args.batch_size)
+            create_anomaly_report(tally_anomalies(stream, counts), output_file)
+            print(f"\nDetailed report saved to '{output_file}'")
+            print_summary_counts(counts)
+            return
+
+        if args.incremental:
+            anomalies = process_database_incremental(
+                "data.xlsx", workers=args.workers
+            )
+        else:
+            anomalies = process_database("data.xlsx", workers=args.workers)
 
-        # Create detailed Excel report
-        output_file = "anomaly_report.xlsx"
+        # Create detailed report
         create_anomaly_report(anomalies, output_file)
         print(f"\nDetailed report saved to '{output_file}'")
 
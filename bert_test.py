@@ -1,53 +1,159 @@
-from transformers import pipeline
+import argparse
+import time
+import torch
 from transformers import AutoModelForMaskedLM, AutoTokenizer
+from quantize import compare_models, load_quantized, print_comparison
+from sample_cards import MISSPELLED_CARD_TEXTS
 
-def load_model_and_tokenizer():
+def load_model_and_tokenizer(model_name="bert-base-uncased", quantized=False):
     # Load a BERT-based model fine-tuned for masked language modeling
-    model_name = "bert-base-uncased"  # You can change this to another BERT model
+    # ("bert-base-uncased" by default; you can change this to another BERT model)
     tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForMaskedLM.from_pretrained(model_name)
+    if quantized:
+        # Int8 weights for CPU inference, built once and cached locally
+        model = load_quantized(model_name, "masked-lm", AutoModelForMaskedLM)
+    else:
+        model = AutoModelForMaskedLM.from_pretrained(model_name)
     return tokenizer, model
 
+class SpellingCorrector:
+    """
+    Masked-language-model spelling correction for many texts at once.
+    The tokenizer and model are loaded once; texts are run in padded
+    batches on the CPU and every mask gets its top-k candidates.
+    quantized=True uses the int8 version of the model.
+    """
+
+    def __init__(self, model_name="bert-base-uncased", batch_size=32, num_threads=None, quantized=False):
+        self.tokenizer, self.model = load_model_and_tokenizer(model_name, quantized)
+        self.model.eval()
+        self.batch_size = batch_size
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+    def build_input(self, misspelled_text, misspelled_words):
+        """
+        Build the model input as:
+        "misspelled: <original sentence> [SEP] spell corrected: <sentence with [MASK]>"
+        """
+        mask = self.tokenizer.mask_token
+        text_correction_template = " ".join(
+            word if word not in misspelled_words else mask
+            for word in misspelled_text.split()
+        )
+        return f"misspelled: {misspelled_text} [SEP] spell corrected: {text_correction_template}"
+
+    def predict(self, texts, top_k=5):
+        """
+        Texts containing mask tokens -> for each text, a list with one
+        [(candidate, score), ...] list per mask, best candidate first.
+        """
+        # Batch texts of similar length together to keep padding small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        results = [None] * len(texts)
+
+        with torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                encoded = self.tokenizer(
+                    [texts[i] for i in batch], padding=True, truncation=True, return_tensors="pt"
+                )
+                logits = self.model(**encoded).logits
+
+                rows, cols = (encoded["input_ids"] == self.tokenizer.mask_token_id).nonzero(as_tuple=True)
+                scores, token_ids = logits[rows, cols].softmax(dim=-1).topk(top_k, dim=-1)
+
+                for i in batch:
+                    results[i] = []
+                for row, row_scores, row_ids in zip(rows.tolist(), scores.tolist(), token_ids.tolist()):
+                    tokens = self.tokenizer.convert_ids_to_tokens(row_ids)
+                    results[batch[row]].append(list(zip(tokens, row_scores)))
+
+        return results
+
+    def correct(self, items, top_k=5):
+        """
+        Correct (misspelled_text, misspelled_words) pairs. Returns, for each
+        pair, the model input with every mask replaced by its best candidate
+        and the candidates per mask.
+        """
+        texts = [self.build_input(text, words) for text, words in items]
+        mask = self.tokenizer.mask_token
+
+        corrected = []
+        for text, candidates in zip(texts, self.predict(texts, top_k)):
+            for mask_candidates in candidates:
+                text = text.replace(mask, mask_candidates[0][0], 1)
+            corrected.append((text, candidates))
+        return corrected
+
+    def benchmark(self, texts, top_k=5):
+        """Run predict() over the texts and return the throughput in texts/s."""
+        start = time.perf_counter()
+        self.predict(texts, top_k)
+        return len(texts) / (time.perf_counter() - start)
+
+_corrector = None
+
 def correct_spelling(misspelled_text, misspelled_words):
     """
     Correct misspelled words by processing the input as:
     "misspelled: <original sentence>"
     "corrected: <sentence with [MASK]>"
     """
-    # Prepare the input text for BERT
-    text_correction_template = " ".join(
-        word if word not in misspelled_words else "[MASK]"
-        for word in misspelled_text.split()
-    )
+    global _corrector
+    if _corrector is None:
+        _corrector = SpellingCorrector()
 
-    input_text = f"misspelled: {misspelled_text} [SEP] spell corrected: {text_correction_template}"
-    # Create a pipeline for masked language modeling
-    fill_mask = pipeline("fill-mask", model=model, tokenizer=tokenizer)
+    corrected_text, _ = _corrector.correct([(misspelled_text, misspelled_words)])[0]
+    return corrected_text
 
-    # Get predictions for the masked token
-    predictions = fill_mask(input_text)
+def compare_quantized(model_name="bert-base-uncased", repeats=3):
+    """Compare the float and int8 models on misspelled card texts."""
+    float_corrector = SpellingCorrector(model_name)
+    int8_corrector = SpellingCorrector(model_name, quantized=True)
+    texts = [float_corrector.build_input(text, words) for text, words in MISSPELLED_CARD_TEXTS]
 
-    # Use the top prediction to replace [MASK]
-    corrected_word = predictions[0]['token_str']
+    def top_candidates(corrector):
+        # Compare the best candidate for every mask
+        return lambda texts: [
+            [candidates[0][0] for candidates in masks]
+            for masks in corrector.predict(texts)
+        ]
 
-    # Replace [MASK] with the predicted word in the corrected sentence
-    corrected_text = input_text.replace("[MASK]", corrected_word)
+    results = compare_models(
+        float_corrector.model, top_candidates(float_corrector),
+        int8_corrector.model, top_candidates(int8_corrector),
+        texts, repeats,
+    )
+    print_comparison(results)
+    return results
 
-    return corrected_text
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BERT spelling correction")
+    parser.add_argument("--model", default="bert-base-uncased")
+    parser.add_argument("--quantized", action="store_true", help="use the int8 model (CPU)")
+    parser.add_argument("--compare-quantized", action="store_true", help="benchmark the int8 model against the float one")
+    args = parser.parse_args()
+
+    if args.compare_quantized:
+        compare_quantized(args.model)
+        raise SystemExit
+
+    corrector = SpellingCorrector(args.model, quantized=args.quantized)
 
-# Load the model and tokenizer
-tokenizer, model = load_model_and_tokenizer()
+    # Input text with a misspelled word
 
-# Input text with a misspelled word
+    # Perform spelling correction
+    misspelled_text="I went to the shop because my laptop changing cable was broken"
+    misspelled_words=["changing"]
 
-# Perform spelling correction
-misspelled_text="I went to the shop because my laptop changing cable was broken"
-misspelled_words=["changing"]
+    corrected_text, candidates = corrector.correct([(misspelled_text, misspelled_words)])[0]
 
-corrected_text = correct_spelling(
-    misspelled_text,
-    misspelled_words
-)
+    print("Model input:\n", misspelled_text, "\n")
+    print("Model output:\n", corrected_text)
+    print("Candidates:\n", candidates)
 
-print("Model input:\n", misspelled_text, "\n")
-print("Model output:\n", corrected_text)
+    # Measure CPU throughput on a batch of repeated inputs
+    texts = [corrector.build_input(misspelled_text, misspelled_words)] * 256
+    print(f"\nThroughput: {corrector.benchmark(texts):.1f} texts/s")
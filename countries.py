@@ -1,37 +1,16 @@
-import pandas as pd
-from collections import Counter
+from data_cache import load_table
+from profiler import NATIONALITY_COLUMNS, unique_values
 
 
 def analyze_unique_nationalities(file_path):
     """
     Analyze and list unique nationalities in the dataset
     """
-    # Read the Excel file
-    df = pd.read_excel(file_path)
+    # Read the nationality columns of the dataset
+    df = load_table(file_path, columns=NATIONALITY_COLUMNS)
 
-    # Get all nationality columns
-    nationality_columns = [
-        "Nationality",
-        "Alternative Nationality 1",
-        "Alternative Nationality 2",
-        "Inferred Nationality",
-    ]
-
-    # Create a set for unique nationalities
-    unique_nationalities = set()
-
-    # Process each nationality column
-    for col in nationality_columns:
-        # Get non-null values and convert to lowercase for consistency
-        nationalities = df[col].dropna().astype(str).str.strip().str.lower()
-        unique_nationalities.update(nationalities)
-
-    # Remove invalid entries
-    invalid_entries = {"", "nan", "//", " "}
-    unique_nationalities = unique_nationalities - invalid_entries
-
-    # Sort alphabetically
-    sorted_nationalities = sorted(unique_nationalities)
+    # Unique lowercased values across all columns, sorted alphabetically
+    sorted_nationalities = unique_values(df, NATIONALITY_COLUMNS)
 
     # Print results
     print("\nUNIQUE NATIONALITIES FOUND IN DATASET")
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import pandas as pd
+from typing import List, Optional
+
+# Cached copies live next to the source workbook
+CACHE_DIR_NAME = ".data_cache"
+
+
+def load_table(
+    file_path: str, columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Load an Excel workbook through a columnar cache.
+
+    The first load parses the workbook once and stores it as an
+    uncompressed Feather (Arrow IPC) file. Later loads memory-map that
+    file and only materialize the requested columns. The cache is
+    rebuilt when the source file's modification time and content hash
+    no longer match. Without pyarrow the workbook is read directly.
+    """
+    try:
+        from pyarrow import feather
+    except ImportError:
+        return pd.read_excel(file_path, usecols=columns)
+
+    cache_path, meta_path = _cache_paths(file_path)
+    if not (os.path.exists(cache_path) and _is_current(file_path, meta_path)):
+        _build_cache(file_path, cache_path, meta_path)
+
+    table = feather.read_table(cache_path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def cache_file(file_path: str, suffix: str) -> str:
+    """
+    Path of a derived file for file_path inside the cache directory,
+    e.g. cache_file("data.xlsx", ".feather") -> .data_cache/data.feather
+    """
+    directory, name = os.path.split(os.path.abspath(file_path))
+    stem = os.path.splitext(name)[0]
+    return os.path.join(directory, CACHE_DIR_NAME, stem + suffix)
+
+
+def _cache_paths(file_path: str):
+    return cache_file(file_path, ".feather"), cache_file(file_path, ".json")
+
+
+def _file_hash(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(file_path: str) -> dict:
+    """Size, modification time and content hash of a file."""
+    stat = os.stat(file_path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": _file_hash(file_path),
+    }
+
+
+def fingerprint_matches(file_path: str, stored: dict) -> bool:
+    """
+    Check a stored fingerprint against the file. Matching mtime and
+    size are trusted as is; otherwise the content hash decides (a
+    touched but unchanged file still matches, and the stored mtime is
+    updated in place).
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return False
+    if stat.st_size != stored.get("size"):
+        return False
+    if stat.st_mtime_ns == stored.get("mtime_ns"):
+        return True
+    if _file_hash(file_path) != stored.get("sha256"):
+        return False
+
+    stored["mtime_ns"] = stat.st_mtime_ns
+    return True
+
+
+def _is_current(file_path: str, meta_path: str) -> bool:
+    """Check the fingerprint stored in meta_path against the source file."""
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+
+    mtime_ns = meta.get("mtime_ns")
+    if not fingerprint_matches(file_path, meta):
+        return False
+    if meta["mtime_ns"] != mtime_ns:
+        _write_json(meta_path, meta)
+    return True
+
+
+def _build_cache(file_path: str, cache_path: str, meta_path: str):
+    from pyarrow import feather
+
+    print(f"Building columnar cache for '{file_path}'...")
+    source = fingerprint(file_path)
+    df = _arrow_safe(pd.read_excel(file_path))
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    # Uncompressed so later loads can memory-map the columns
+    feather.write_feather(df, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, cache_path)
+
+    _write_json(meta_path, {"source": os.path.abspath(file_path), **source})
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Arrow needs one type per column. Excel columns mixing numbers,
+    dates and text are stored as the str() of each non-null cell,
+    which is how every consumer reads them anyway.
+    """
+    df = df.reset_index(drop=True)
+    df.columns = [str(c) for c in df.columns]
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        kind = pd.api.types.infer_dtype(df[col], skipna=True)
+        if kind not in ("string", "empty"):
+            present = df[col].notna()
+            df[col] = df[col].where(~present, df[col].map(str))
+    return df
+
+
+def _write_json(path: str, data: dict):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
@@ -4,35 +4,46 @@ import os
 # Add the current directory to the module search path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-import pandas as pd
-from langchain_ollama import OllamaLLM
-from anomaly import HolocaustRecordValidator
+from ollama_client import get_client, warm_up
+from llm_cache import bypass_requested, cached_invoke, generation_options, get_cache
+from anomaly import HolocaustRecordValidator, read_anomaly_report
+from fuzzy_match import FuzzyMatcher
 import json
 import re
 
 ### Suggestion generation function:
 # fix_dictionary: Fix the dictionary using the model (gemma:7b)
 # accepts: raw_data(string list); valid_nationalities(dictionary), model_name(optional, string)
-def fix_dictionary(raw_data, valid_nationalities, model_name="gemma:7b"):
+def build_prompt(raw_data, valid_nationalities):
     """
-    Takes a dictionary to be corrected and a list of valid values. 
-    Uses an Ollama model to correct the dictionary values and returns the fixed dictionary.
+    The correction prompt for a chunk of raw values. generate_column_fix_suggestions
+    builds its prompts here too, so both scripts share LLM cache entries.
     """
     # Convert the dictionary to a key-value string format:
     raw_data_str = ', '.join([f'"{key}": "{value}"' for key, value in raw_data.items()])
 
-    # Prompt construction:
+    # Prompt construction (sorted, so a set of valid values gives the same
+    # prompt, and the same LLM cache key, in every process):
     prompt = f"""
-    Convert each of the provided nationalities in the JSON object to one of the valid nationalities: {', '.join(valid_nationalities)}.
+    Convert each of the provided nationalities in the JSON object to one of the valid nationalities: {', '.join(sorted(valid_nationalities))}.
     Return the results as a JSON object where the keys match the input keys, with no additional formatting or explanation.
 
     Input: {{{raw_data_str}}}
     Output:
     """
+    return prompt
+
+def fix_dictionary(raw_data, valid_nationalities, model_name="gemma:7b", bypass_cache=False):
+    """
+    Takes a dictionary to be corrected and a list of valid values. 
+    Uses an Ollama model to correct the dictionary values and returns the fixed dictionary.
+    Responses are reused from the shared LLM cache unless bypass_cache is set.
+    """
+    prompt = build_prompt(raw_data, valid_nationalities)
 
     # Model prompt
-    model = OllamaLLM(model=model_name)
-    response = model(prompt)
+    model = get_client(model_name)
+    response = cached_invoke(model, prompt, bypass=bypass_cache)
     print(response)
 
     # Extract the JSON portion of the response in case the model messes up
@@ -50,35 +61,73 @@ def fix_dictionary(raw_data, valid_nationalities, model_name="gemma:7b"):
         print("Error decoding JSON response:", e)
         return None
 
-def extract_invalid_nationality(file_path):
+def split_dictionary(input_dict, chunk_size):
+    items = list(input_dict.items())
+    return [dict(items[i:i + chunk_size]) for i in range(0, len(items), chunk_size)]
+
+def correct_distinct_values(values, valid_nationalities, chunk_size=20, model_name="gemma:7b"):
     """
-    Extracts a dictionary of fields with issue type 'invalid_nationality',
-    matching 'TD' to 'Current Value'.
+    Corrects each distinct value once with the model, which is loaded
+    before the first chunk and kept loaded between chunks.
+
+    Every correction is also cached on its own, under the prompt for that
+    value alone, and reused by later runs; only the values without one are
+    sent, in sorted order. A new or changed value then only costs its own
+    chunk, instead of shifting every chunk after it.
 
     Args:
-        file_path (str): Path to the Excel file.
+        values (iterable): Raw nationality values, possibly repeated.
+        valid_nationalities (list): List of valid nationalities.
+        chunk_size (int): Number of values sent to the model per prompt.
+        model_name (str): Ollama model used for the corrections.
 
     Returns:
-        dict: Dictionary with 'TD' as keys and 'Current Value' as values.
+        dict: Dictionary mapping each corrected raw value to its suggestion.
     """
-    # Load the Excel file into a DataFrame
-    df = pd.read_excel(file_path)
-
-    # Filter rows with issue type 'invalid_nationality'
-    filtered_df = df[df['Issue Type'] == 'invalid_nationality']
+    model = get_client(model_name)
+    cache = None if bypass_requested() else get_cache()
+    options = generation_options(model)
+
+    def value_prompt(value):
+        return build_prompt({"0": value}, valid_nationalities)
+
+    corrections = {}
+    uncached = []
+    for value in sorted(set(values)):
+        response = cache.get(model.model, value_prompt(value), options) if cache else None
+        if response is None:
+            uncached.append(value)
+        else:
+            corrections[value] = json.loads(response)["0"]
+    if corrections:
+        print(f"Reused {len(corrections)} cached corrections")
 
-    # Create a dictionary with 'TD' as keys and 'Current Value' as values
-    result_dict = filtered_df.set_index('TD')['Current Value'].to_dict()
+    # Number the values so the model's answer can be matched back to them
+    numbered = {str(i): value for i, value in enumerate(uncached)}
+    chunks = split_dictionary(numbered, chunk_size)
 
-    return result_dict
+    if chunks:
+        warm_up(model_name)
+    for i, chunk in enumerate(chunks):
+        print(f"Processing chunk {i + 1}/{len(chunks)}...")
+        fixed_chunk = fix_dictionary(chunk, valid_nationalities, model_name)
+        if fixed_chunk:
+            for key, value in chunk.items():
+                if key in fixed_chunk:
+                    corrections[value] = fixed_chunk[key]
+                    if cache is not None:
+                        cache.put(model.model, value_prompt(value), json.dumps({"0": fixed_chunk[key]}), options)
 
-def split_dictionary(input_dict, chunk_size):
-    items = list(input_dict.items())
-    return [dict(items[i:i + chunk_size]) for i in range(0, len(items), chunk_size)]
+    if chunks:
+        print(get_client(model_name).timing_stats())
+    return corrections
 
 def generate_suggestions_file(file_path, valid_nationalities):
     """
-    Creates a new file with a 'Suggestions' column based on fixed nationalities, processing in chunks.
+    Creates a new file with a 'Suggestions' column based on fixed nationalities.
+    Distinct invalid values are first matched locally against the valid list;
+    only the ambiguous ones are sent to the model, once each. Corrections are
+    applied to every TD carrying that value, with their source and score.
 
     Args:
         file_path (str): Path to the anomaly report Excel file.
@@ -87,15 +136,15 @@ def generate_suggestions_file(file_path, valid_nationalities):
     Returns:
         None
     """
-    # Read the original Excel file
-    df = pd.read_excel(file_path)
+    # Read the original report
+    df = read_anomaly_report(file_path)
 
     # Extract invalid nationalities
     print("Extracting invalid nationalities...")
-    invalid_nationalities = extract_invalid_nationality(file_path)
-    print(invalid_nationalities)
+    invalid_df = df[df['Issue Type'] == 'invalid_nationality']
+    invalid_values = invalid_df['Current Value'].astype(str)
 
-    if not invalid_nationalities:
+    if invalid_df.empty:
         print("No invalid nationalities found.")
         # Add an empty "Suggestions" column and save the new file
         df['Suggestions'] = None
@@ -103,29 +152,35 @@ def generate_suggestions_file(file_path, valid_nationalities):
         print("File saved with no suggestions.")
         return
 
-    # Split the invalid nationalities into smaller chunks
-    chunk_size = 20
-    chunks = split_dictionary(invalid_nationalities, chunk_size)
+    distinct_count = invalid_values.nunique()
+    print(f"{len(invalid_values)} invalid nationalities, {distinct_count} distinct values")
 
-    # Initialize an empty dictionary to store all fixed suggestions
-    fixed_dict = {}
+    # Resolve clear typos and truncations without the model
+    matcher = FuzzyMatcher(valid_nationalities)
+    matched, remaining = matcher.resolve(invalid_values.unique())
+    corrections = {value: best for value, (best, _) in matched.items()}
+    scores = {value: score for value, (_, score) in matched.items()}
+    sources = dict.fromkeys(matched, "fuzzy")
+    print(f"Matched {len(matched)} distinct values locally, {len(remaining)} left for the model")
 
-    # Process each chunk using the model
+    # Correct each remaining distinct value once
     print("Fixing invalid nationalities in chunks...")
-    for i, chunk in enumerate(chunks):
-        if i > 3:
-            break
-        print(f"Processing chunk {i + 1}/{len(chunks)}...")
-        fixed_chunk = fix_dictionary(chunk, valid_nationalities)
-        if fixed_chunk:
-            fixed_dict.update(fixed_chunk)  # Add the fixed chunk to the main dictionary
+    model_corrections = correct_distinct_values(remaining, valid_nationalities)
+    corrections.update(model_corrections)
+    sources.update(dict.fromkeys(model_corrections, "model"))
 
-    # Add a new column 'Suggestions' to the DataFrame
-    df['Suggestions'] = df['TD'].map(fixed_dict)  # Map the fixed nationalities to the corresponding rows
+    # Broadcast the corrections back to every TD with that value
+    for column, mapping in [('Suggestions', corrections), ('Suggestion Source', sources), ('Suggestion Score', scores)]:
+        td_values = dict(zip(invalid_df['TD'], invalid_values.map(mapping)))
+        df[column] = df['TD'].map(td_values)  # Map the fixed nationalities to the corresponding rows
 
     # Save the updated DataFrame to a new file
     df.to_excel("anomaly_suggestions.xlsx", index=False)
     print("File saved as anomaly_suggestions.xlsx with suggestions added.")
+    print(f"Corrected {len(corrections)}/{distinct_count} distinct values "
+          f"({len(matched)} fuzzy, {len(model_corrections)} model), "
+          f"covering {invalid_values.isin(corrections.keys()).sum()}/{len(invalid_values)} rows")
+    print(get_cache().stats())
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def trigrams(text: str) -> List[str]:
+    """Character trigrams of the text, padded so short words still have some."""
+    padded = f"  {text} "
+    return [padded[i : i + 3] for i in range(len(padded) - 2)]
+
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Levenshtein distance between a and b, counting an adjacent swap as one
+    edit. Gives up early and returns max_distance + 1 once the distance is
+    known to exceed max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = None
+    current = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous = previous, current
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + cost,
+            )
+            if (
+                before is not None
+                and j > 1
+                and a[i - 1] == b[j - 2]
+                and a[i - 2] == b[j - 1]
+            ):
+                current[j] = min(current[j], before[j - 2] + 1)
+        # Later rows build on this one, or on the previous one plus a swap
+        if min(current) > max_distance and min(previous) >= max_distance:
+            return max_distance + 1
+    return min(current[-1], max_distance + 1)
+
+
+class FuzzyMatcher:
+    """
+    Matches raw values against a fixed list of valid values without a
+    model. Candidates are looked up in a trigram index and scored by
+    bounded edit distance; truncations of a single valid value (e.g.
+    "hungar") also count. match() only answers when the best candidate
+    is clearly ahead, so ambiguous values can be left to the model.
+    """
+
+    def __init__(self, valid_values: Iterable[str], min_score: float = 0.8):
+        self.valid_values = sorted({v.lower() for v in valid_values})
+        self.min_score = min_score
+
+        self.index: Dict[str, List[int]] = {}
+        for i, value in enumerate(self.valid_values):
+            for gram in set(trigrams(value)):
+                self.index.setdefault(gram, []).append(i)
+
+    @staticmethod
+    def normalize(value: str) -> str:
+        return " ".join(str(value).lower().replace(".", " ").split())
+
+    def match(self, value: str) -> Tuple[Optional[str], float]:
+        """
+        Returns (valid value, score) for a confident match, or
+        (None, best score) when the value should go to the model.
+        """
+        text = self.normalize(value)
+        if not text:
+            return None, 0.0
+        if text in self.valid_values:
+            return text, 1.0
+
+        # Truncated entries: a prefix of exactly one valid value
+        if len(text) >= 4:
+            prefixed = [v for v in self.valid_values if v.startswith(text)]
+            if len(prefixed) == 1:
+                score = 0.8 + 0.2 * len(text) / len(prefixed[0])
+                return prefixed[0], score
+
+        shared = Counter()
+        for gram in set(trigrams(text)):
+            shared.update(self.index.get(gram, ()))
+
+        max_distance = 1 if len(text) <= 5 else 2
+        scored = []
+        for i, _ in shared.most_common(10):
+            candidate = self.valid_values[i]
+            distance = bounded_edit_distance(text, candidate, max_distance)
+            if distance <= max_distance:
+                score = 1 - distance / max(len(text), len(candidate))
+                scored.append((score, candidate))
+        if not scored:
+            return None, 0.0
+
+        scored.sort(reverse=True)
+        best_score, best = scored[0]
+        if len(scored) > 1 and scored[1][0] == best_score:
+            return None, best_score
+        if best_score < self.min_score:
+            return None, best_score
+        return best, best_score
+
+    def resolve(self, values: Iterable[str]):
+        """
+        Splits the values into confident matches, as a dictionary mapping
+        value -> (valid value, score), and the list of values left over.
+        """
+        matched = {}
+        remaining = []
+        for value in values:
+            best, score = self.match(value)
+            if best is None:
+                remaining.append(value)
+            else:
+                matched[value] = (best, score)
+        return matched, remaining
@@ -1,30 +1,23 @@
-from langchain_ollama import OllamaLLM
+from ollama_client import get_client
+from llm_cache import cached_invoke
+from data_to_fix import build_prompt
 import json
 import re
 
 ### Suggestion generation function:
 # fix_dictionary: Fix the dictionary using the model (gemma:7b)
 # accepts: raw_data(string list); valid_nationalities(dictionary), model_name(optional, string)
-def fix_dictionary(raw_data, valid_nationalities, model_name="gemma:7b"):
+def fix_dictionary(raw_data, valid_nationalities, model_name="gemma:7b", bypass_cache=False):
     """
     Takes a dictionary to be corrected and a list of valid values. 
     Uses an Ollama model to correct the dictionary values and returns the fixed dictionary.
+    Responses are reused from the shared LLM cache unless bypass_cache is set.
     """
-    # Convert the dictionary to a key-value string format:
-    raw_data_str = ', '.join([f'"{key}": "{value}"' for key, value in raw_data.items()])
-
-    # Prompt construction:
-    prompt = f"""
-    Convert each of the provided nationalities in the JSON object to one of the valid nationalities: {', '.join(valid_nationalities)}.
-    Return the results as a JSON object where the keys match the input keys, with no additional formatting or explanation.
-
-    Input: {{{raw_data_str}}}
-    Output:
-    """
+    prompt = build_prompt(raw_data, valid_nationalities)
 
     # Model prompt
-    model = OllamaLLM(model=model_name)
-    response = model(prompt)
+    model = get_client(model_name)
+    response = cached_invoke(model, prompt, bypass=bypass_cache)
 
     # Extract the JSON portion of the response in case the model messes up
     try:
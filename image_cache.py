@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Tuple
+
+from PIL import Image
+
+# Resized images kept in memory, at most (in bytes of pixel data)
+IMAGE_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def fit_size(
+    image_size: Tuple[int, int], box: Tuple[int, int]
+) -> Tuple[int, int]:
+    """Largest size with the image's aspect ratio that fits in the box."""
+    image_width, image_height = image_size
+    box_width, box_height = box
+    image_ratio = image_width / image_height
+    box_ratio = box_width / box_height
+
+    if image_ratio > box_ratio:
+        # Image is wider than the box
+        return box_width, int(box_width / image_ratio)
+    # Image is taller than the box
+    return int(box_height * image_ratio), box_height
+
+
+def load_resized(path: str, box: Tuple[int, int]) -> Image.Image:
+    """Open an image and LANCZOS-resize it to fit the box."""
+    with Image.open(path) as image:
+        return image.resize(
+            fit_size(image.size, box), Image.Resampling.LANCZOS
+        )
+
+
+def image_bytes(image: Image.Image) -> int:
+    return image.width * image.height * len(image.getbands())
+
+
+class ImageCache:
+    """
+    LRU cache of resized images keyed by (path, box size), holding at
+    most max_bytes of pixel data. prefetch() loads images on a
+    background thread so they are ready before they are asked for;
+    get() waits for an image that is already being loaded instead of
+    loading it twice.
+
+    The cache holds PIL images: Tk PhotoImages must still be created on
+    the main thread.
+    """
+
+    def __init__(self, max_bytes: int = IMAGE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.images = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="image-prefetch"
+        )
+
+    def get(self, path: str, box: Tuple[int, int]) -> Image.Image:
+        key = (path, tuple(box))
+        with self.lock:
+            if key in self.images:
+                self.images.move_to_end(key)
+                return self.images[key]
+            future = self.pending.get(key)
+
+        if future is not None:
+            return future.result()
+        return self._load(key)
+
+    def prefetch(self, paths: Iterable[str], box: Tuple[int, int]):
+        """Load the images in the background, skipping cached ones."""
+        for path in paths:
+            key = (path, tuple(box))
+            with self.lock:
+                if key in self.images or key in self.pending:
+                    continue
+                self.pending[key] = self.executor.submit(self._load, key)
+
+    def _load(self, key) -> Image.Image:
+        try:
+            image = load_resized(*key)
+            self._store(key, image)
+            return image
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+
+    def _store(self, key, image: Image.Image):
+        size = image_bytes(image)
+        with self.lock:
+            if key in self.images:
+                return
+            self.images[key] = image
+            self.total_bytes += size
+            # Evict the least recently used images, but keep this one
+            while self.total_bytes > self.max_bytes and len(self.images) > 1:
+                _, evicted = self.images.popitem(last=False)
+                self.total_bytes -= image_bytes(evicted)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,89 @@
+import os
+import pickle
+import re
+from typing import Dict, List
+
+from data_cache import cache_file
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# The TD number is the first run of digits in the file name, so
+# "410029.jpg", "410029_back.jpg" and "TD410029-2.png" all belong to
+# TD 410029
+TD_PATTERN = re.compile(r"\d+")
+
+
+def normalize_td(text: str):
+    """The TD number in the text without leading zeros, or None."""
+    match = TD_PATTERN.search(text)
+    if match is None:
+        return None
+    return match.group().lstrip("0") or "0"
+
+
+def td_from_filename(name: str):
+    """TD number of an image file name, or None if it has none."""
+    return normalize_td(os.path.splitext(name)[0])
+
+
+class ImageIndex:
+    """
+    Maps TD numbers to the card images in a directory (several per TD
+    are kept in name order). The index is built with a single scandir
+    pass and saved next to the directory; it is reused until the
+    directory's modification time changes, which happens whenever a
+    file is added, removed or renamed.
+    """
+
+    def __init__(self, directory: str, images: Dict[str, List[str]]):
+        self.directory = directory
+        self.images = images
+
+    @classmethod
+    def load(cls, directory: str) -> "ImageIndex":
+        index_path = cache_file(directory, ".image_index.pkl")
+        mtime_ns = os.stat(directory).st_mtime_ns
+        try:
+            with open(index_path, "rb") as f:
+                stored = pickle.load(f)
+            if stored["mtime_ns"] == mtime_ns:
+                return cls(directory, stored["images"])
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError):
+            pass
+
+        images = cls.scan(directory)
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                {"mtime_ns": mtime_ns, "images": images},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_path, index_path)
+        return cls(directory, images)
+
+    @staticmethod
+    def scan(directory: str) -> Dict[str, List[str]]:
+        images = {}
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                td = td_from_filename(entry.name)
+                if td is not None:
+                    images.setdefault(td, []).append(entry.name)
+        for names in images.values():
+            names.sort()
+        return images
+
+    def paths(self, td) -> List[str]:
+        """Image paths for a TD, empty if there are none."""
+        key = normalize_td(str(td))
+        return [
+            os.path.join(self.directory, name)
+            for name in self.images.get(key, ())
+        ]
+
+    def __len__(self):
+        return len(self.images)
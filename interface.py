@@ -1,15 +1,14 @@
 import customtkinter as ctk
 import tkinter as tk
-from tkcalendar import DateEntry
-import pandas as pd
+from tkcalendar import Calendar, DateEntry
 from typing import Dict, List
-from anomaly import Anomaly
-from PIL import Image, ImageTk
+from viewer_session import load_session
+from journey_map import get_map, parse_geo_location
+from image_cache import IMAGE_CACHE_BYTES, ImageCache
+from image_index import ImageIndex
+from PIL import ImageTk
 import os
-import folium
-from folium import plugins
 import webbrowser
-import json
 import io
 import requests
 
@@ -17,6 +16,47 @@ import requests
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
+# Card images are resized to fit the image panel (800x700 minus padding)
+IMAGE_BOX = (796, 696)
+
+# Records on each side of the current one whose images are prefetched
+PREFETCH_RADIUS = 2
+
+# Fields shown on the record card, using the exact column names of the data
+CARD_FIELDS = [
+    "TD",
+    "Last Name",
+    "First Name",
+    "Birthdate",
+    "Birth Place",
+    "Nationality",
+    "Religion",
+    "Automatic Validation",
+]
+
+
+def is_date_field(field):
+    return "Date" in field or "Birthdate" in field
+
+
+def format_date(value):
+    """Dates as dd/mm/yyyy; anything else is shown as it is."""
+    try:
+        return value.strftime("%d/%m/%Y")
+    except (AttributeError, ValueError):
+        return value
+
+
+def set_entry(entry_widget, text, invalid=False):
+    """Replace the text of a read-only entry and mark it (in)valid."""
+    entry_widget.configure(state="normal")
+    entry_widget.delete(0, tk.END)
+    entry_widget.insert(0, text)
+    entry_widget.configure(
+        state="readonly", fg_color="#662222" if invalid else "#2b2b2b"
+    )
+
+
 # Sample data and status
 sample_data = {
     "ID": "123456",
@@ -53,9 +93,11 @@ field_status = {
 
 
 class RecordViewer(ctk.CTk):
-    def __init__(self):
+    def __init__(self, image_cache_bytes=IMAGE_CACHE_BYTES):
         super().__init__()
         self.current_td_index = 0
+        self.image_cache = ImageCache(image_cache_bytes)
+        self.image_index = None
 
         # Configure window
         self.title("Record Viewer")
@@ -115,6 +157,11 @@ class RecordViewer(ctk.CTk):
             row=0, column=0, sticky="nsew", padx=20, pady=20
         )
 
+        # Lay out the record view once; the calendar is created when opened
+        self.calendar_popup = None
+        self.calendar_field = None
+        self.create_record_view()
+
         # Create navigation at bottom
         self.create_navigation()
 
@@ -173,63 +220,59 @@ class RecordViewer(ctk.CTk):
         )
         self.next_btn.pack(side="left", padx=10)
 
+    def image_paths(self, index):
+        """Card images of the record at index in td_list."""
+        if self.image_index is None:
+            # Built once per directory change, then reused across runs
+            self.image_index = ImageIndex.load("card_images")
+        return self.image_index.paths(self.td_list[index])
+
     def load_image(self, td):
         try:
-            image_files = [
-                f
-                for f in os.listdir("card_images")
-                if f.endswith((".jpg", ".jpeg", ".png"))
-            ]
-            image_index = self.current_td_index % len(image_files)
-            image_path = os.path.join("card_images", image_files[image_index])
-
-            # Get panel dimensions (accounting for minimal padding)
-            panel_width = 796  # 800 - 4 (padding)
-            panel_height = 696  # 700 - 4 (padding)
-
-            # Load image
-            image = Image.open(image_path)
-
-            # Calculate aspect ratios
-            image_ratio = image.width / image.height
-            panel_ratio = panel_width / panel_height
-
-            # Determine new size while maintaining aspect ratio
-            if image_ratio > panel_ratio:
-                # Image is wider than panel
-                new_width = panel_width
-                new_height = int(panel_width / image_ratio)
-            else:
-                # Image is taller than panel
-                new_height = panel_height
-                new_width = int(panel_height * image_ratio)
-
-            # Resize image
-            image = image.resize(
-                (new_width, new_height), Image.Resampling.LANCZOS
-            )
+            paths = self.image_paths(self.current_td_index)
+            if not paths:
+                raise FileNotFoundError(f"No card image for TD {td}")
+
+            # Resized image from the cache (or loaded now if not prefetched)
+            image = self.image_cache.get(paths[0], IMAGE_BOX)
             photo = ImageTk.PhotoImage(image)
-            self.image_label.configure(image=photo)
+            self.image_label.configure(image=photo, text="")
             self.image_label.image = photo
+
+            # Get the neighbouring records' images ready in the background
+            first = max(0, self.current_td_index - PREFETCH_RADIUS)
+            last = min(
+                len(self.td_list) - 1, self.current_td_index + PREFETCH_RADIUS
+            )
+            neighbours = sorted(
+                range(first, last + 1),
+                key=lambda i: abs(i - self.current_td_index),
+            )
+            self.image_cache.prefetch(
+                [
+                    paths[0]
+                    for paths in map(self.image_paths, neighbours[1:])
+                    if paths
+                ],
+                IMAGE_BOX,
+            )
         except Exception as e:
             self.image_label.configure(image="")
             self.image_label.configure(text="No image available")
 
     def show_current_record(self):
+        # A date picked after navigating must not land in another record
+        self.close_calendar()
         try:
             print("\nSHOWING RECORD:")
-            # Clear previous content
-            for widget in self.content_frame.winfo_children():
-                widget.destroy()
-
             # Get current record
             current_td = self.td_list[self.current_td_index]
             print("Current TD:", current_td)
 
-            record_mask = self.data_df["TD"] == current_td
-            print("Records matching TD:", sum(record_mask))
+            record_row = self.row_by_td[current_td]
+            print("Record row:", record_row)
 
-            record_data = self.data_df[record_mask].iloc[0].to_dict()
+            record_data = self.data_df.iloc[record_row].to_dict()
             print("Record data:", record_data)
 
             # Calculate consistency score
@@ -243,69 +286,31 @@ class RecordViewer(ctk.CTk):
 
             print("Status:", status)
 
-            # Create navigation frame
-            nav_frame = ctk.CTkFrame(
-                self.content_frame, fg_color="#252525", corner_radius=12
-            )
-            nav_frame.pack(padx=20, pady=20, fill="x")
-
-            # Add Consistency Score, TD, and OCR Confidence labels in navbar
-            consistency_label = ctk.CTkLabel(
-                nav_frame,
-                text=f"Consistency Score: {consistency_score}",
-                font=("Inter", 12, "bold"),
-                text_color="#8b8b8b",
-            )
-            consistency_label.pack(side="left", padx=15, pady=15)
-
-            td_label = ctk.CTkLabel(
-                nav_frame,
-                text=f"TD: {current_td}",
-                font=("Inter", 12, "bold"),
-                text_color="#8b8b8b",
+            # Update the Consistency Score, TD, and OCR Confidence labels
+            self.consistency_label.configure(
+                text=f"Consistency Score: {consistency_score}"
             )
-            td_label.pack(side="left", padx=15, pady=15)
-
-            ocr_label = ctk.CTkLabel(
-                nav_frame,
-                text=f"OCR Confidence: {record_data.get('Overall Confidence OCR', 'N/A')}",
-                font=("Inter", 12, "bold"),
-                text_color="#8b8b8b",
+            self.td_label.configure(text=f"TD: {current_td}")
+            self.ocr_label.configure(
+                text=f"OCR Confidence: {record_data.get('Overall Confidence OCR', 'N/A')}"
             )
-            ocr_label.pack(side="left", padx=15, pady=15)
 
-            # Add map button if geo data exists
-            if "Geo Location" in record_data and record_data["Geo Location"]:
+            # Show the map button only if geo data exists; the map itself
+            # is generated when the button is pressed
+            self.map_button.pack_forget()
+            self.geo_data = None
+            if "Geo Location" in record_data:
                 try:
-                    # Clean and parse the JSON string
-                    geo_string = str(record_data["Geo Location"])
-                    geo_string = geo_string.replace('""', '"')
-                    if geo_string.startswith('"') and geo_string.endswith('"'):
-                        geo_string = geo_string[1:-1]
-
-                    geo_data = json.loads(geo_string)
-
-                    # Create interactive map
-                    map_path = self.create_map(geo_data)
-
-                    # Create a button to open the map
-                    map_button = ctk.CTkButton(
-                        nav_frame,
-                        text="Open Journey Map",
-                        command=lambda: webbrowser.open(
-                            f"file://{os.path.abspath(map_path)}"
-                        ),
-                        fg_color="#1a1a1a",
-                        hover_color="#2a2a2a",
-                        height=32,
+                    self.geo_data = parse_geo_location(
+                        record_data["Geo Location"]
                     )
-                    map_button.pack(side="right", padx=30, pady=15)
-
                 except Exception as e:
-                    print(f"Error creating map: {str(e)}")
+                    print(f"Error reading geo data: {str(e)}")
+                if self.geo_data is not None:
+                    self.map_button.pack(side="right", padx=30, pady=15)
 
-            # Create data frame and continue with rest of the data display...
-            self.create_card(record_data, status, consistency_score)
+            # Fill the card's fields with this record
+            self.update_card(record_data, status, consistency_score)
 
             # Load corresponding image
             self.load_image(current_td)
@@ -316,7 +321,44 @@ class RecordViewer(ctk.CTk):
 
             traceback.print_exc()
 
-    def create_card(self, data, status, consistency_score, suggestions=None):
+    def create_record_view(self):
+        """
+        Lay out the navbar and the card once. Navigating between records
+        only updates these widgets in place.
+        """
+        # Create navigation frame
+        nav_frame = ctk.CTkFrame(
+            self.content_frame, fg_color="#252525", corner_radius=12
+        )
+        nav_frame.pack(padx=20, pady=20, fill="x")
+
+        # Consistency Score, TD, and OCR Confidence labels in navbar
+        self.consistency_label, self.td_label, self.ocr_label = [
+            ctk.CTkLabel(
+                nav_frame,
+                text="",
+                font=("Inter", 12, "bold"),
+                text_color="#8b8b8b",
+            )
+            for _ in range(3)
+        ]
+        for label in (self.consistency_label, self.td_label, self.ocr_label):
+            label.pack(side="left", padx=15, pady=15)
+
+        # Button to open the map, packed only for records with geo data
+        self.geo_data = None
+        self.map_button = ctk.CTkButton(
+            nav_frame,
+            text="Open Journey Map",
+            command=self.open_map,
+            fg_color="#1a1a1a",
+            hover_color="#2a2a2a",
+            height=32,
+        )
+
+        self.create_card()
+
+    def create_card(self):
         card_frame = ctk.CTkFrame(
             self.content_frame, fg_color="#252525", corner_radius=12
         )
@@ -326,31 +368,21 @@ class RecordViewer(ctk.CTk):
         header_frame = ctk.CTkFrame(card_frame, fg_color="transparent")
         header_frame.pack(fill="x", padx=15, pady=(15, 5))
 
-        score_label = ctk.CTkLabel(
+        self.score_label = ctk.CTkLabel(
             header_frame,
-            text=f"Consistency Score: {consistency_score}%",
+            text="",
             font=("Inter", 16, "bold"),
             text_color="#ffffff",
         )
-        score_label.pack(side="left")
+        self.score_label.pack(side="left")
 
         # Fields section
         fields_frame = ctk.CTkFrame(card_frame, fg_color="transparent")
         fields_frame.pack(fill="both", expand=True, padx=15, pady=15)
 
-        # Use exact column names from your data
-        fields = [
-            "TD",
-            "Last Name",
-            "First Name",
-            "Birthdate",
-            "Birth Place",
-            "Nationality",
-            "Religion",
-            "Automatic Validation",
-        ]
-
-        for i, field in enumerate(fields):
+        # One entry per field, reused for every record
+        self.field_entries = {}
+        for i, field in enumerate(CARD_FIELDS):
             # Field label
             field_label = ctk.CTkLabel(
                 fields_frame,
@@ -361,95 +393,132 @@ class RecordViewer(ctk.CTk):
             )
             field_label.grid(row=i, column=0, sticky="w", pady=8, padx=5)
 
-            value = data.get(field, "")
-
             # Entry widget
-            if "Date" in field or "Birthdate" in field:
-                entry_widget = DateEntry(
-                    fields_frame,
-                    width=20,
-                    date_pattern="dd/mm/yyyy",
-                    background=(
-                        "#2b2b2b"
-                        if status.get(field) != "invalid"
-                        else "#662222"
-                    ),
-                    foreground="#ffffff",
-                    borderwidth=0,
-                )
-                try:
-                    entry_widget.set_date(value)
-                except:
-                    entry_widget.delete(0, tk.END)
-                    entry_widget.insert(0, str(value))
-            else:
-                entry_widget = ctk.CTkEntry(
+            entry_widget = ctk.CTkEntry(
+                fields_frame,
+                width=200,
+                height=32,
+                font=("Inter", 13),
+                fg_color="#2b2b2b",
+                text_color="#ffffff",
+                border_color="#404040",
+                corner_radius=6,
+                state="readonly",
+            )
+            entry_widget.grid(row=i, column=1, pady=8, padx=5, sticky="ew")
+            self.field_entries[field] = entry_widget
+
+            # Date fields get a button opening the calendar
+            if is_date_field(field):
+                calendar_button = ctk.CTkButton(
                     fields_frame,
-                    width=200,
+                    text="▾",
+                    width=32,
                     height=32,
-                    font=("Inter", 13),
-                    fg_color="#2b2b2b",
-                    text_color="#ffffff",
-                    border_color="#404040",
                     corner_radius=6,
+                    fg_color="#2b2b2b",
+                    hover_color="#404040",
+                    command=lambda field=field: self.open_calendar(field),
                 )
-                entry_widget.insert(0, str(value))
-
-                if status.get(field) == "invalid":
-                    entry_widget.configure(fg_color="#662222")
-
-            entry_widget.configure(state="readonly")
-            entry_widget.grid(row=i, column=1, pady=8, padx=5, sticky="ew")
+                calendar_button.grid(row=i, column=2, pady=8, padx=5)
 
         fields_frame.grid_columnconfigure(1, weight=1)
         return card_frame
 
+    def update_card(self, data, status, consistency_score, suggestions=None):
+        self.score_label.configure(
+            text=f"Consistency Score: {consistency_score}%"
+        )
+        for field, entry_widget in self.field_entries.items():
+            value = data.get(field, "")
+            if is_date_field(field):
+                value = format_date(value)
+            invalid = status.get(field) == "invalid"
+            set_entry(entry_widget, str(value), invalid)
+
+    def open_calendar(self, field):
+        """Show the calendar under a date field, creating it on first use."""
+        if self.calendar_popup is None:
+            self.calendar_popup = tk.Toplevel(self)
+            self.calendar_popup.overrideredirect(True)
+            self.calendar = Calendar(
+                self.calendar_popup,
+                selectmode="day",
+                date_pattern="dd/mm/yyyy",
+                background="#2b2b2b",
+                foreground="#ffffff",
+                borderwidth=0,
+            )
+            self.calendar.pack()
+            self.calendar.bind("<<CalendarSelected>>", self.select_date)
+            self.calendar_popup.bind(
+                "<Escape>", lambda e: self.close_calendar()
+            )
+            self.calendar_popup.bind("<FocusOut>", self.calendar_focus_out)
+
+        entry_widget = self.field_entries[field]
+        self.calendar_field = field
+        try:
+            self.calendar.selection_set(entry_widget.get())
+        except Exception:
+            pass
+
+        x = entry_widget.winfo_rootx()
+        y = entry_widget.winfo_rooty() + entry_widget.winfo_height()
+        self.calendar_popup.geometry(f"+{x}+{y}")
+        self.calendar_popup.deiconify()
+        self.calendar_popup.lift()
+        self.calendar_popup.focus_set()
+
+    def select_date(self, event=None):
+        if self.calendar_field is None:
+            return
+        entry_widget = self.field_entries[self.calendar_field]
+        invalid = entry_widget.cget("fg_color") == "#662222"
+        set_entry(entry_widget, self.calendar.get_date(), invalid)
+        self.close_calendar()
+
+    def close_calendar(self):
+        if self.calendar_popup is not None:
+            self.calendar_popup.withdraw()
+        self.calendar_field = None
+
+    def calendar_focus_out(self, event=None):
+        # Focus also leaves the popup's window for its own widgets; only
+        # close once it has settled somewhere outside the popup
+        self.after_idle(self._close_calendar_if_unfocused)
+
+    def _close_calendar_if_unfocused(self):
+        try:
+            focused = self.focus_get()
+        except KeyError:
+            focused = None
+        if (
+            focused is None
+            or focused.winfo_toplevel() is not self.calendar_popup
+        ):
+            self.close_calendar()
+
     def load_data(self):
         try:
             print("\nLOADING DATA:")
-            # Load existing data
-            self.data_df = pd.read_excel("data.xlsx")
+            # Records, TD index, grouped anomalies and suggestions, from
+            # the pre-built session bundle (rebuilt if a source changed)
+            session = load_session()
+            self.data_df = session.records
             print("Data columns:", self.data_df.columns.tolist())
             print("First row of data:", self.data_df.iloc[0].to_dict())
 
-            self.anomaly_df = pd.read_excel("anomaly_report.xlsx")
-            print("\nAnomaly columns:", self.anomaly_df.columns.tolist())
+            self.anomalies_by_td = session.anomalies_by_td
+            print("\nAnomalies:", self.anomalies_by_td.n_anomalies)
 
-            self.suggestions_df = pd.read_excel("suggestions.xlsx")
+            self.suggestions_df = session.suggestions
             print(
                 "\nSuggestions columns:", self.suggestions_df.columns.tolist()
             )
 
-            # Clean column names by stripping whitespace
-            self.data_df.columns = self.data_df.columns.str.strip()
-
-            # Ensure TD column is string in data and anomaly DataFrames
-            self.data_df["TD"] = self.data_df["TD"].astype(str)
-            self.anomaly_df["TD"] = self.anomaly_df["TD"].astype(str)
-
-            # Group anomalies by TD
-            self.anomalies_by_td = (
-                self.anomaly_df.groupby("TD")
-                .apply(
-                    lambda x: [
-                        Anomaly(
-                            row["Field"],
-                            row["Current Value"],
-                            row["Issue Type"],
-                            float(row["Confidence"].strip("%")) / 100,
-                        )
-                        for _, row in x.iterrows()
-                    ]
-                )
-                .to_dict()
-            )
-
-            # Get list of TDs with anomalies that exist in the data
-            self.td_list = [
-                td
-                for td in self.anomalies_by_td.keys()
-                if any(self.data_df["TD"] == td)
-            ]
+            self.row_by_td = session.row_by_td
+            self.td_list = session.td_list
 
             print("\nFound TDs with anomalies:", self.td_list)
 
@@ -474,97 +543,22 @@ class RecordViewer(ctk.CTk):
             self.current_td_index -= 1
             self.show_current_record()
 
+    def destroy(self):
+        self.image_cache.close()
+        super().destroy()
+
     def create_map(self, geo_data):
-        """Create an interactive map showing the journey path"""
-        try:
-            # Create a map centered on Europe
-            m = folium.Map(location=[50.0, 10.0], zoom_start=4)
-
-            # Extract markers and paths from geo_data
-            markers = geo_data.get("markers", [])
-            paths = geo_data.get("paths", [])
-
-            coordinates = []
-            if markers and paths:
-                # Create a dictionary of locations for quick lookup
-                locations = {}
-                for marker in markers:
-                    location = marker.get("location", {})
-                    lat = location.get("lat")
-                    lon = location.get("lon")
-                    label = marker.get("label", "")
-                    marker_type = marker.get("type", "Location")
-                    if lat is not None and lon is not None:
-                        locations[label] = {
-                            "coords": [float(lat), float(lon)],
-                            "type": marker_type,
-                        }
-
-                # Add markers and collect coordinates in path order
-                location_number = 1
-                added_locations = set()  # Keep track of added locations
-
-                # Add first location
-                first_path = paths[0]
-                first_label = first_path.get("fromLabel", "")
-                if first_label in locations:
-                    loc_data = locations[first_label]
-                    coords = loc_data["coords"]
-                    if tuple(coords) not in added_locations:
-                        coordinates.append(coords)
-                        added_locations.add(tuple(coords))
-                        # Create custom icon with number
-                        icon = folium.DivIcon(
-                            html=f'<div style="font-size: 12pt; color: white; background-color: red; border-radius: 50%; width: 25px; height: 25px; display: flex; align-items: center; justify-content: center; border: 2px solid white;"><b>{location_number}</b></div>'
-                        )
-                        folium.Marker(
-                            coords,
-                            popup=f"{location_number}. {first_label} ({loc_data['type']})",
-                            icon=icon,
-                        ).add_to(m)
-                        location_number += 1
-
-                # Add subsequent locations
-                for path in paths:
-                    to_label = path.get("toLabel", "")
-                    if to_label in locations:
-                        loc_data = locations[to_label]
-                        coords = loc_data["coords"]
-                        if tuple(coords) not in added_locations:
-                            coordinates.append(coords)
-                            added_locations.add(tuple(coords))
-                            # Create custom icon with number
-                            icon = folium.DivIcon(
-                                html=f'<div style="font-size: 12pt; color: white; background-color: red; border-radius: 50%; width: 25px; height: 25px; display: flex; align-items: center; justify-content: center; border: 2px solid white;"><b>{location_number}</b></div>'
-                            )
-                            folium.Marker(
-                                coords,
-                                popup=f"{location_number}. {to_label} ({loc_data['type']})",
-                                icon=icon,
-                            ).add_to(m)
-                            location_number += 1
-
-            # Add path lines if we have coordinates
-            if len(coordinates) > 1:
-                # Add a line connecting the points
-                folium.PolyLine(
-                    coordinates, weight=2, color="red", opacity=0.8
-                ).add_to(m)
-
-                # Add animated path
-                plugins.AntPath(coordinates).add_to(m)
-
-            # Save the map
-            map_path = os.path.join(
-                os.path.dirname(__file__), "journey_map.html"
-            )
-            m.save(map_path)
-            return map_path
+        """Journey map for the geo data, built only if not cached on disk"""
+        return get_map(geo_data)
 
+    def open_map(self):
+        # Build (or reuse) the current record's map only when asked for
+        try:
+            map_path = self.create_map(self.geo_data)
         except Exception as e:
-            print(f"Error in create_map: {str(e)}")
-            print("Geo data structure:", geo_data)
-            raise
+            print(f"Error creating map: {str(e)}")
+            return
+        webbrowser.open(f"file://{os.path.abspath(map_path)}")
 
 
 def create_card(root, data, status, consistency_score):
@@ -587,7 +581,9 @@ def create_card(root, data, status, consistency_score):
     spacing_frame.grid_columnconfigure(2, weight=1)
 
     # TD number with pill style
-    td_frame = ctk.CTkFrame(spacing_frame, fg_color="#2d5a88", corner_radius=15)
+    td_frame = ctk.CTkFrame(
+        spacing_frame, fg_color="#2d5a88", corner_radius=15
+    )
     td_frame.grid(row=0, column=0, padx=10)
 
     td_label = ctk.CTkLabel(
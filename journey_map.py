@@ -0,0 +1,268 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import folium
+import pandas as pd
+from folium import plugins
+
+from data_cache import load_table
+
+# Generated maps are stored here as <key[:2]>/<key>.html
+MAP_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "journey_maps"
+)
+
+# Part of every map's key: bump it when build_map draws maps differently,
+# so existing files are no longer considered current
+MAP_VERSION = 1
+
+# One row per TD: its map key, file (relative to the map directory) and
+# what happened to it in the last batch run
+MANIFEST_FILE = "manifest.csv"
+
+
+def parse_geo_location(value):
+    """
+    The geo JSON of a record's "Geo Location" cell, or None when the
+    cell is empty. Quotes doubled by the CSV/Excel export are undone.
+    """
+    if value is None or value != value or not str(value).strip():
+        return None
+
+    # Clean and parse the JSON string
+    geo_string = str(value)
+    geo_string = geo_string.replace('""', '"')
+    if geo_string.startswith('"') and geo_string.endswith('"'):
+        geo_string = geo_string[1:-1]
+    return json.loads(geo_string)
+
+
+def geo_key(geo_data):
+    """Content hash of the geo JSON; equal routes share one map file."""
+    canonical = json.dumps(
+        {"version": MAP_VERSION, "geo": geo_data},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+def map_path(geo_data, directory=MAP_DIR):
+    key = geo_key(geo_data)
+    return os.path.join(directory, key[:2], f"{key}.html")
+
+
+def build_map(geo_data):
+    """Create an interactive map showing the journey path"""
+    # Create a map centered on Europe
+    m = folium.Map(location=[50.0, 10.0], zoom_start=4)
+
+    # Extract markers and paths from geo_data
+    markers = geo_data.get("markers", [])
+    paths = geo_data.get("paths", [])
+
+    coordinates = []
+    if markers and paths:
+        # Create a dictionary of locations for quick lookup
+        locations = {}
+        for marker in markers:
+            location = marker.get("location", {})
+            lat = location.get("lat")
+            lon = location.get("lon")
+            label = marker.get("label", "")
+            marker_type = marker.get("type", "Location")
+            if lat is not None and lon is not None:
+                locations[label] = {
+                    "coords": [float(lat), float(lon)],
+                    "type": marker_type,
+                }
+
+        # Add markers and collect coordinates in path order
+        location_number = 1
+        added_locations = set()  # Keep track of added locations
+
+        # Add first location
+        first_path = paths[0]
+        first_label = first_path.get("fromLabel", "")
+        if first_label in locations:
+            loc_data = locations[first_label]
+            coords = loc_data["coords"]
+            if tuple(coords) not in added_locations:
+                coordinates.append(coords)
+                added_locations.add(tuple(coords))
+                # Create custom icon with number
+                icon = folium.DivIcon(
+                    html=f'<div style="font-size: 12pt; color: white; background-color: red; border-radius: 50%; width: 25px; height: 25px; display: flex; align-items: center; justify-content: center; border: 2px solid white;"><b>{location_number}</b></div>'
+                )
+                folium.Marker(
+                    coords,
+                    popup=f"{location_number}. {first_label} ({loc_data['type']})",
+                    icon=icon,
+                ).add_to(m)
+                location_number += 1
+
+        # Add subsequent locations
+        for path in paths:
+            to_label = path.get("toLabel", "")
+            if to_label in locations:
+                loc_data = locations[to_label]
+                coords = loc_data["coords"]
+                if tuple(coords) not in added_locations:
+                    coordinates.append(coords)
+                    added_locations.add(tuple(coords))
+                    # Create custom icon with number
+                    icon = folium.DivIcon(
+                        html=f'<div style="font-size: 12pt; color: white; background-color: red; border-radius: 50%; width: 25px; height: 25px; display: flex; align-items: center; justify-content: center; border: 2px solid white;"><b>{location_number}</b></div>'
+                    )
+                    folium.Marker(
+                        coords,
+                        popup=f"{location_number}. {to_label} ({loc_data['type']})",
+                        icon=icon,
+                    ).add_to(m)
+                    location_number += 1
+
+    # Add path lines if we have coordinates
+    if len(coordinates) > 1:
+        # Add a line connecting the points
+        folium.PolyLine(
+            coordinates, weight=2, color="red", opacity=0.8
+        ).add_to(m)
+
+        # Add animated path
+        plugins.AntPath(coordinates).add_to(m)
+
+    return m
+
+
+def get_map(geo_data, directory=MAP_DIR):
+    """
+    Path of the journey map for the geo JSON. The map is only built
+    when no file exists yet for its content hash.
+    """
+    path = map_path(geo_data, directory)
+    if os.path.exists(path):
+        return path
+
+    try:
+        m = build_map(geo_data)
+    except Exception as e:
+        print(f"Error in create_map: {str(e)}")
+        print("Geo data structure:", geo_data)
+        raise
+
+    # Save the map under a temporary name, then move it into place
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    m.save(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _render(item):
+    """Build one map in a worker; returns (key, error message or None)."""
+    key, geo_data, directory = item
+    try:
+        get_map(geo_data, directory)
+        return key, None
+    except Exception as e:
+        return key, str(e)
+
+
+def precompute_maps(
+    data_file="data.xlsx", directory=MAP_DIR, workers=1, chunksize=16
+) -> pd.DataFrame:
+    """
+    Render the journey map of every TD with geo data into directory,
+    in a process pool. Maps whose file already exists are current and
+    skipped; TDs sharing a route share one map. Writes and returns the
+    manifest.
+    """
+    df = load_table(data_file)
+    df.columns = df.columns.str.strip()
+
+    rows = []
+    pending = {}
+    for td, value in zip(df["TD"].map(str), df["Geo Location"]):
+        try:
+            geo_data = parse_geo_location(value)
+        except ValueError as e:
+            rows.append((td, "", "", "invalid", str(e)))
+            continue
+        if geo_data is None:
+            rows.append((td, "", "", "no_geo", ""))
+            continue
+
+        key = geo_key(geo_data)
+        path = map_path(geo_data, directory)
+        relative = os.path.relpath(path, directory)
+        if os.path.exists(path):
+            rows.append((td, key, relative, "current", ""))
+        else:
+            pending.setdefault(key, geo_data)
+            rows.append((td, key, relative, "built", ""))
+
+    start = time.perf_counter()
+    items = [(key, geo, directory) for key, geo in pending.items()]
+    if workers > 1 and len(items) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            errors = dict(executor.map(_render, items, chunksize=chunksize))
+    else:
+        errors = dict(map(_render, items))
+    elapsed = time.perf_counter() - start
+
+    manifest = pd.DataFrame(
+        rows, columns=["TD", "Map Key", "Map File", "Status", "Error"]
+    )
+    failed = manifest["Map Key"].map(errors).notna()
+    manifest.loc[failed, "Status"] = "error"
+    manifest.loc[failed, "Error"] = manifest.loc[failed, "Map Key"].map(errors)
+
+    os.makedirs(directory, exist_ok=True)
+    manifest.to_csv(os.path.join(directory, MANIFEST_FILE), index=False)
+
+    rendered = len(items) - sum(e is not None for e in errors.values())
+    print(
+        f"Rendered {rendered} maps in {elapsed:.1f}s "
+        f"({rendered / max(elapsed, 1e-9):.1f} maps/s)"
+    )
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render the journey map of every TD"
+    )
+    parser.add_argument("--data", default="data.xlsx", help="dataset file")
+    parser.add_argument(
+        "--output", default=MAP_DIR, help="directory of the sharded maps"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of processes rendering maps",
+    )
+    args = parser.parse_args()
+
+    try:
+        manifest = precompute_maps(args.data, args.output, args.workers)
+        counts = manifest["Status"].value_counts()
+        for status, count in counts.items():
+            print(f"{status}: {count} TDs")
+        print(
+            f"\nManifest saved to "
+            f"'{os.path.join(args.output, MANIFEST_FILE)}'"
+        )
+    except FileNotFoundError:
+        print(f"Error: {args.data} file not found!")
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+
+
+if __name__ == "__main__":
+    main()
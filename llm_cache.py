@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Optional
+
+# Responses are stored in this SQLite file unless another path is given
+CACHE_FILE = "llm_cache.sqlite"
+
+# Least recently used responses are evicted above this total size
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+# Set LLM_CACHE_BYPASS=1 to always query the model
+BYPASS_ENV_VAR = "LLM_CACHE_BYPASS"
+
+# Generation options that change what a model returns for a prompt
+GENERATION_OPTIONS = [
+    "temperature",
+    "top_k",
+    "top_p",
+    "num_predict",
+    "num_ctx",
+    "repeat_penalty",
+    "seed",
+    "stop",
+    "format",
+]
+
+
+class LLMCache:
+    """
+    Persistent cache of model responses, keyed by model name, prompt and
+    generation options. Entries carry a last-used timestamp so the cache
+    can evict the least recently used ones once it grows past max_bytes.
+    """
+
+    def __init__(self, path=CACHE_FILE, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_used "
+            "ON responses (last_used)"
+        )
+        self.db.commit()
+        self.total_bytes = self.size()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, options: Optional[dict] = None):
+        payload = json.dumps(
+            {"model": model, "prompt": prompt, "options": options or {}},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, model, prompt, options=None) -> Optional[str]:
+        key = self.make_key(model, prompt, options)
+        row = self.db.execute(
+            "SELECT response FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.db.execute(
+            "UPDATE responses SET last_used = ? WHERE key = ?",
+            (time.time(), key),
+        )
+        self.db.commit()
+        return row[0]
+
+    def put(self, model, prompt, response: str, options=None):
+        key = self.make_key(model, prompt, options)
+        size = len(response.encode("utf-8"))
+        old = self.db.execute(
+            "SELECT size FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        self.db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+            (key, model, response, size, time.time()),
+        )
+        self.total_bytes += size - (old[0] if old else 0)
+        self._evict()
+        self.db.commit()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes:
+            key, size = self.db.execute(
+                "SELECT key, size FROM responses ORDER BY last_used LIMIT 1"
+            ).fetchone()
+            self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.total_bytes -= size
+
+    def size(self) -> int:
+        """Total size of the stored responses, in bytes."""
+        return self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    def stats(self) -> str:
+        entries = self.db.execute("SELECT COUNT(*) FROM responses")
+        return (
+            f"LLM cache: {self.hits} hits, {self.misses} misses, "
+            f"{entries.fetchone()[0]} entries "
+            f"({self.total_bytes / 1e6:.1f} MB)"
+        )
+
+    def close(self):
+        self.db.close()
+
+
+_default_cache = None
+
+
+def get_cache() -> LLMCache:
+    """The process-wide cache shared by every module."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = LLMCache()
+    return _default_cache
+
+
+def bypass_requested() -> bool:
+    return os.environ.get(BYPASS_ENV_VAR, "") not in ("", "0")
+
+
+def generation_options(llm) -> dict:
+    """
+    Options of a client (an OllamaClient, or an OllamaLLM instance) that
+    are part of the cache key.
+    """
+    configured = getattr(llm, "options", None) or {}
+    options = {}
+    for name in GENERATION_OPTIONS:
+        value = configured.get(name, getattr(llm, name, None))
+        if value is not None:
+            options[name] = value
+    return options
+
+
+def cached_invoke(llm, prompt: str, bypass: bool = False) -> str:
+    """
+    llm.invoke(prompt), answered from the shared cache when the same
+    model, prompt and options were seen before.
+    """
+    if bypass or bypass_requested():
+        return llm.invoke(prompt)
+
+    cache = get_cache()
+    options = generation_options(llm)
+    response = cache.get(llm.model, prompt, options)
+    if response is None:
+        response = llm.invoke(prompt)
+        cache.put(llm.model, prompt, response, options)
+    return response
@@ -0,0 +1,260 @@
+import json
+import random
+import threading
+import time
+from typing import Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+OLLAMA_URL = "http://localhost:11434"
+
+# Seconds to wait for a connection, and for the next bytes of a response
+# (the first response to a cold model includes loading it)
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 300
+
+# Failed requests are retried this many times, with jittered backoff
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 1.0
+
+# Connections kept open to the server, enough for concurrent callers
+# (batch jobs with more requests in flight call set_pool_size)
+POOL_SIZE = 16
+
+# Responses with these statuses are worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# How long the server keeps a model in memory after its last request
+KEEP_ALIVE = "30m"
+
+# Loads shorter than this (in seconds) mean the model was already in memory
+LOAD_LOG_THRESHOLD = 0.5
+
+
+class OllamaError(Exception):
+    """
+    The Ollama server could not answer a request. Connection, protocol
+    and malformed-response errors are all raised as this type.
+    """
+
+
+class OllamaClient:
+    """
+    Client for Ollama's /api/generate endpoint over a keep-alive
+    connection pool. stream() yields the response text as it arrives;
+    generate() (also available as invoke(), like OllamaLLM) returns the
+    whole response. Connection errors, timeouts and overloaded-server
+    responses are retried with exponential backoff and full jitter.
+
+    Every request asks the server to keep the model loaded for
+    keep_alive. The durations the server reports are added up, so the
+    time spent loading the model is kept apart from generation time.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        base_url: str = OLLAMA_URL,
+        session: Optional[requests.Session] = None,
+        options: Optional[dict] = None,
+        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+        retries: int = MAX_RETRIES,
+        keep_alive=KEEP_ALIVE,
+    ):
+        self.model = model
+        self.url = base_url.rstrip("/") + "/api/generate"
+        self.session = session or new_session()
+        self.options = dict(options or {})
+        self.timeout = timeout
+        self.retries = retries
+        self.keep_alive = keep_alive
+
+        self.requests = 0
+        self.loads = 0
+        self.load_seconds = 0.0
+        self.generation_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _payload(self, prompt: str, stream: bool, options=None) -> dict:
+        payload = {"model": self.model, "prompt": prompt, "stream": stream}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        merged = {**self.options, **(options or {})}
+        if merged:
+            payload["options"] = merged
+        return payload
+
+    def _post(self, payload: dict, stream: bool) -> requests.Response:
+        """POST the payload, retrying until the server answers with 200."""
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.post(
+                    self.url, json=payload, stream=stream, timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except requests.RequestException as e:
+                # Not worth retrying, e.g. an invalid URL
+                raise OllamaError(f"Ollama request failed: {e}") from e
+            else:
+                if response.status_code == 200:
+                    return response
+                error = OllamaError(
+                    f"{response.status_code}: {response.text.strip()}"
+                )
+                response.close()
+                if response.status_code not in RETRY_STATUSES:
+                    raise error
+
+            if attempt == self.retries:
+                raise OllamaError(
+                    f"Ollama request failed after {attempt + 1} attempts: "
+                    f"{error}"
+                ) from error
+            time.sleep(random.uniform(0, BACKOFF_SECONDS * 2**attempt))
+
+    def stream(self, prompt: str, options=None) -> Iterator[str]:
+        """
+        Yield the response text piece by piece. Only the request itself is
+        retried; an error after the first piece is raised to the caller.
+        """
+        payload = self._payload(prompt, stream=True, options=options)
+        with self._post(payload, stream=True) as response:
+            lines = response.iter_lines()
+            while True:
+                try:
+                    line = next(lines, None)
+                    if line is None:
+                        break
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                except (requests.RequestException, ValueError) as e:
+                    raise OllamaError(
+                        f"Ollama stream was interrupted: {e}"
+                    ) from e
+                if "error" in chunk:
+                    raise OllamaError(chunk["error"])
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    self._record(chunk)
+                    break
+
+    def generate(self, prompt: str, options=None) -> str:
+        """The whole response to the prompt, in a single request."""
+        payload = self._payload(prompt, stream=False, options=options)
+        with self._post(payload, stream=False) as response:
+            result = _read_json(response)
+        if "error" in result:
+            raise OllamaError(result["error"])
+        self._record(result)
+        return result.get("response", "")
+
+    invoke = generate
+
+    def warm_up(self) -> float:
+        """
+        Load the model before a batch job starts, so the first real
+        request does not pay for it. Returns the load time in seconds.
+        """
+        start = time.perf_counter()
+        payload = self._payload("", stream=False)
+        with self._post(payload, stream=False) as response:
+            result = _read_json(response)
+        if "error" in result:
+            raise OllamaError(result["error"])
+
+        load = result.get("load_duration", 0) / 1e9
+        with self._lock:
+            self.loads += 1
+            self.load_seconds += load
+        print(
+            f"Warmed up {self.model} in {time.perf_counter() - start:.1f}s "
+            f"(load {load:.1f}s, keep_alive {self.keep_alive})"
+        )
+        return load
+
+    def _record(self, result: dict):
+        """Add the durations the server reported (in nanoseconds)."""
+        load = result.get("load_duration", 0) / 1e9
+        generation = (
+            result.get("prompt_eval_duration", 0)
+            + result.get("eval_duration", 0)
+        ) / 1e9
+        with self._lock:
+            self.requests += 1
+            self.generation_seconds += generation
+            if load >= LOAD_LOG_THRESHOLD:
+                self.loads += 1
+                self.load_seconds += load
+        if load >= LOAD_LOG_THRESHOLD:
+            print(f"Model {self.model} was loaded for a request ({load:.1f}s)")
+
+    def timing_stats(self) -> str:
+        return (
+            f"{self.model}: {self.requests} requests, "
+            f"{self.generation_seconds:.1f}s generating, "
+            f"{self.loads} loads taking {self.load_seconds:.1f}s"
+        )
+
+
+def _read_json(response: requests.Response) -> dict:
+    try:
+        return response.json()
+    except (requests.RequestException, ValueError) as e:
+        raise OllamaError(f"Malformed Ollama response: {e}") from e
+
+
+def new_session(pool_size: int = POOL_SIZE) -> requests.Session:
+    session = requests.Session()
+    _mount_pool(session, pool_size)
+    return session
+
+
+def _mount_pool(session: requests.Session, pool_size: int):
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+
+_session = None
+_clients = {}
+
+
+def set_pool_size(pool_size: int):
+    """
+    Size the shared connection pool for pool_size concurrent requests.
+    With more requests in flight than pooled connections, the extra
+    connections are closed after each response instead of kept alive.
+    Call it before sending requests: open connections are dropped.
+    """
+    global _session
+    if _session is None:
+        _session = new_session(pool_size)
+    else:
+        _mount_pool(_session, pool_size)
+
+
+def get_client(model: str, keep_alive=None, **kwargs) -> OllamaClient:
+    """
+    The process-wide client for a model. Every client shares one
+    connection pool, so connections are opened once per process.
+    keep_alive, when given, also applies to an existing client.
+    """
+    global _session
+    if _session is None:
+        _session = new_session()
+    if model not in _clients:
+        _clients[model] = OllamaClient(model, session=_session, **kwargs)
+    if keep_alive is not None:
+        _clients[model].keep_alive = keep_alive
+    return _clients[model]
+
+
+def warm_up(model: str, keep_alive=None) -> OllamaClient:
+    """Load a model through its shared client ahead of a batch job."""
+    client = get_client(model, keep_alive=keep_alive)
+    client.warm_up()
+    return client
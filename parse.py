@@ -1,13 +1,14 @@
-import pandas as pd
 import numpy as np
+from data_cache import load_table
+from profiler import value_counts
 
 
 def load_database(file_path):
     """
     Load and parse the Excel database
     """
-    # Read the Excel file
-    df = pd.read_excel(file_path)
+    # Read the Excel file (through the shared columnar cache)
+    df = load_table(file_path)
 
     # Clean column names (remove leading/trailing whitespace and special characters)
     df.columns = df.columns.str.strip()
@@ -34,9 +35,6 @@ def analyze_nationalities(df):
     Analyze and count nationalities from all nationality columns
     Returns a dictionary with nationality counts
     """
-    # Initialize dictionary to store nationality counts
-    nationality_counts = {}
-
     # Columns to check for nationalities
     nationality_columns = [
         "nationality",
@@ -45,19 +43,10 @@ def analyze_nationalities(df):
         "inferred_nationality",
     ]
 
-    # Process each nationality column
-    for col in nationality_columns:
-        if col in df.columns:
-            # Get non-null values from the column
-            nationalities = df[col].dropna()
-
-            # Count each nationality
-            for nat in nationalities:
-                nat = str(nat).strip()
-                if nat:  # Check if nationality is not empty
-                    nationality_counts[nat] = nationality_counts.get(nat, 0) + 1
-
-    return nationality_counts
+    # Count the stripped non-empty values of all present columns at once
+    return value_counts(
+        df, [col for col in nationality_columns if col in df.columns]
+    )
 
 
 def main():
@@ -0,0 +1,127 @@
+import json
+import os
+import sys
+import time
+import pandas as pd
+from typing import Dict, List
+from data_cache import load_table
+
+# Columns holding a nationality
+NATIONALITY_COLUMNS = [
+    "Nationality",
+    "Alternative Nationality 1",
+    "Alternative Nationality 2",
+    "Inferred Nationality",
+]
+
+# Columns profiled by default
+PROFILE_COLUMNS = NATIONALITY_COLUMNS + ["Religion", "Birth Place"]
+
+# Columns that are also profiled together, as one pool of values
+PROFILE_GROUPS = {"All Nationalities": NATIONALITY_COLUMNS}
+
+# Placeholder values that are not real entries
+INVALID_ENTRIES = {"", "nan", "//", " "}
+
+
+def stripped_values(df: pd.DataFrame, columns: List[str]) -> pd.Series:
+    """Non-empty stripped string values of the columns, stacked."""
+    parts = [df[col].dropna().astype(str).str.strip() for col in columns]
+    if not parts:
+        return pd.Series([], dtype=object)
+    values = pd.concat(parts, ignore_index=True)
+    return values[values != ""]
+
+
+def value_counts(df: pd.DataFrame, columns: List[str]) -> Dict[str, int]:
+    """Count each stripped value across the columns, most common first."""
+    counts = stripped_values(df, columns).value_counts()
+    return {str(k): int(v) for k, v in counts.items()}
+
+
+def unique_values(df: pd.DataFrame, columns: List[str]) -> List[str]:
+    """
+    Sorted unique values across the columns, lowercased for consistency,
+    without placeholder entries.
+    """
+    values = set(stripped_values(df, columns).str.lower().unique())
+    return sorted(values - INVALID_ENTRIES)
+
+
+def profile_dataset(
+    file_path: str,
+    columns: List[str] = PROFILE_COLUMNS,
+    groups: Dict[str, List[str]] = PROFILE_GROUPS,
+    output_file: str = "data_profile.json",
+) -> dict:
+    """
+    Read the needed columns of the dataset once and compute value counts
+    and unique values for every column and column group. The profile is
+    written to output_file: JSON, or a long (profile, value, count)
+    table for .parquet.
+    """
+    needed = list(columns)
+    for group_columns in groups.values():
+        needed += [c for c in group_columns if c not in needed]
+    df = load_table(file_path, columns=needed)
+
+    entries = {col: [col] for col in columns}
+    entries.update(groups)
+
+    profile = {
+        "source": os.path.abspath(file_path),
+        "records": len(df),
+        "profiles": {},
+    }
+    for name, entry_columns in entries.items():
+        counts = value_counts(df, entry_columns)
+        profile["profiles"][name] = {
+            "columns": entry_columns,
+            "non_empty": sum(counts.values()),
+            "distinct": len(counts),
+            "value_counts": counts,
+            "unique_values": unique_values(df, entry_columns),
+        }
+
+    if output_file:
+        _write_profile(profile, output_file)
+    return profile
+
+
+def _write_profile(profile: dict, output_file: str):
+    if output_file.lower().endswith(".parquet"):
+        rows = [
+            (name, value, count)
+            for name, entry in profile["profiles"].items()
+            for value, count in entry["value_counts"].items()
+        ]
+        pd.DataFrame(rows, columns=["profile", "value", "count"]).to_parquet(
+            output_file, index=False
+        )
+        return
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    output_file = sys.argv[1] if len(sys.argv) > 1 else "data_profile.json"
+    try:
+        print("Profiling the dataset...")
+        start = time.perf_counter()
+        profile = profile_dataset("data.xlsx", output_file=output_file)
+        elapsed = time.perf_counter() - start
+
+        print(f"\nProfiled {profile['records']} records in {elapsed:.2f}s")
+        for name, entry in profile["profiles"].items():
+            print(f"{name}: {entry['distinct']} distinct values")
+        print(f"\nProfile saved to '{output_file}'")
+
+    except FileNotFoundError:
+        print("Error: data.xlsx file not found!")
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+
+
+if __name__ == "__main__":
+    main()
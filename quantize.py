@@ -0,0 +1,171 @@
+import hashlib
+import os
+import re
+import time
+from typing import Callable, List
+
+import torch
+
+# Quantized models are cached here, next to the scripts
+MODEL_CACHE_DIR = ".model_cache"
+
+
+def quantize_int8(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    Dynamic int8 quantization for CPU inference: the weights of every
+    Linear layer are stored as int8 and activations are quantized on
+    the fly. Embeddings and layer norms stay in float.
+
+    torch.ao.quantization warns that it is deprecated and due to be
+    removed (its replacement is the separate torchao package); it is
+    still shipped and working in torch 2.14.
+    """
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def model_revision(model_name: str, config) -> str:
+    """
+    The revision of a transformers model: the Hub commit it was
+    downloaded from, or for a local directory the names, sizes and
+    modification times of its files.
+    """
+    commit = getattr(config, "_commit_hash", None)
+    if commit:
+        return commit
+    if not os.path.isdir(model_name):
+        return "unknown"
+    with os.scandir(model_name) as entries:
+        files = sorted(
+            (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+            for entry in entries
+            if entry.is_file()
+        )
+    return hashlib.sha256(repr(files).encode()).hexdigest()
+
+
+def quantized_cache_path(model_name: str, kind: str, revision: str) -> str:
+    """
+    Cache file for a model, per model kind. The name includes a hash of
+    the model revision and the torch and transformers versions, since a
+    change to any of them invalidates the quantized weights.
+    """
+    import transformers
+
+    name = re.sub(r"[^\w.-]+", "_", model_name.strip("/"))
+    key = hashlib.sha256(
+        "\0".join(
+            [revision, torch.__version__, transformers.__version__]
+        ).encode()
+    ).hexdigest()[:16]
+    return os.path.join(MODEL_CACHE_DIR, f"{name}-{kind}-int8-{key}.pt")
+
+
+def load_quantized(model_name: str, kind: str, model_class) -> torch.nn.Module:
+    """
+    The int8 version of a pretrained transformers model (model_class is
+    e.g. AutoModelForSeq2SeqLM). The quantized weights are saved as a
+    state dict the first time; later runs quantize a model built from
+    the config alone and load them into it, skipping the float
+    checkpoint.
+    """
+    from transformers import AutoConfig
+
+    config = AutoConfig.from_pretrained(model_name)
+    path = quantized_cache_path(
+        model_name, kind, model_revision(model_name, config)
+    )
+    if os.path.exists(path):
+        model = quantize_int8(model_class.from_config(config))
+        model.load_state_dict(torch.load(path, weights_only=True))
+        return model
+
+    print(f"Quantizing {model_name} to int8 (cached in '{path}')...")
+    model = quantize_int8(model_class.from_pretrained(model_name))
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    tmp_path = path + ".tmp"
+    torch.save(model.state_dict(), tmp_path)
+    os.replace(tmp_path, path)
+    return model
+
+
+def model_size_mb(model: torch.nn.Module) -> float:
+    """
+    Memory held by the model's weights and buffers, in MB. The int8
+    Linear weights are packed outside parameters(), so the tensors of
+    the state dict are counted too; shared storage is counted once.
+    """
+    seen = set()
+    total = 0
+
+    def add(value):
+        nonlocal total
+        if isinstance(value, (tuple, list)):
+            for item in value:
+                add(item)
+        elif isinstance(value, torch.Tensor):
+            storage = value.untyped_storage()
+            if storage.data_ptr() not in seen:
+                seen.add(storage.data_ptr())
+                total += storage.nbytes()
+
+    add(list(model.parameters()))
+    add(list(model.buffers()))
+    add(list(model.state_dict().values()))
+    return total / 1e6
+
+
+def compare_models(
+    float_model: torch.nn.Module,
+    float_run: Callable[[List[str]], list],
+    quantized_model: torch.nn.Module,
+    quantized_run: Callable[[List[str]], list],
+    inputs: List[str],
+    repeats: int = 3,
+) -> dict:
+    """
+    Benchmark the float and int8 versions of a model on the same
+    inputs: best-of-repeats latency per input, weight size, and the
+    fraction of outputs on which they agree. The outputs of both runs
+    are returned too, under "outputs".
+    """
+    results = {}
+    outputs = {}
+    runs = [
+        ("float", float_model, float_run),
+        ("int8", quantized_model, quantized_run),
+    ]
+    for label, model, run in runs:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            outputs[label] = run(inputs)
+            timings.append(time.perf_counter() - start)
+        results[label] = {
+            "latency_ms": 1000 * min(timings) / len(inputs),
+            "size_mb": model_size_mb(model),
+        }
+
+    pairs = list(zip(outputs["float"], outputs["int8"]))
+    agreement = sum(a == b for a, b in pairs) / max(len(pairs), 1)
+    results["agreement"] = agreement
+    results["outputs"] = outputs
+    results["speedup"] = (
+        results["float"]["latency_ms"] / results["int8"]["latency_ms"]
+    )
+    return results
+
+
+def print_comparison(results: dict):
+    for label in ("float", "int8"):
+        entry = results[label]
+        print(
+            f"{label:>5}: {entry['latency_ms']:.1f} ms/input, "
+            f"{entry['size_mb']:.1f} MB"
+        )
+    print(
+        f"Speedup: {results['speedup']:.2f}x, "
+        f"agreement: {results['agreement']:.1%}"
+    )
@@ -1,30 +1,17 @@
-import pandas as pd
-from collections import Counter
+from data_cache import load_table
+from profiler import unique_values
 
 
 def analyze_unique_religions(file_path):
     """
     Analyze and list unique religions in the dataset
     """
-    # Read the Excel file
-    df = pd.read_excel(file_path)
-
     # Get religion column
     religion_column = "Religion"
+    df = load_table(file_path, columns=[religion_column])
 
-    # Create a set for unique religions
-    unique_religions = set()
-
-    # Get non-null values and convert to lowercase for consistency
-    religions = df[religion_column].dropna().astype(str).str.strip().str.lower()
-    unique_religions.update(religions)
-
-    # Remove invalid entries
-    invalid_entries = {"", "nan", "//", " "}
-    unique_religions = unique_religions - invalid_entries
-
-    # Sort alphabetically
-    sorted_religions = sorted(unique_religions)
+    # Unique lowercased values, sorted alphabetically
+    sorted_religions = unique_values(df, [religion_column])
 
     # Print results
     print("\nUNIQUE RELIGIONS FOUND IN DATASET")
@@ -0,0 +1,83 @@
+# Card texts for benchmarking the local models, transcribed from the scans
+# in card_images/ and data/ (plus the card the T5 script started with), in
+# the flat one-line form OCR gives
+CARD_TEXTS = [
+    "T / D 410 029 Name : LISCHNER Eva ge . SKOWRONEK verw . GEFEN BD : "
+    "14.11.191 . Warschau / Polen Nat : isr./poln; Sept. 39 Ende 1940 ZAL . "
+    "Warschau Ende 40 Apr. 43 Gh . Warschau 8 5. 1945 bei Warschau befreit",
+    "Nr. 921/E 152/1942 OFICIUL JUDETEAN AL EVREILOR CERNAUTI Carte de "
+    "identitate Evreul capul de familie Engler Baruch strada Miron Costin "
+    "Nr. 11A Poseda autorizatia si declar. de sedere in Cernauti Nr. "
+    "4419/1941",
+    "Nr. 921/E 153/1942 OFICIUL JUDETEAN AL EVREILOR CERNAUTI Carte de "
+    "identitate Evreul membru de familie Engler Slima strada Miron Costin "
+    "Nr. 11A Poseda adeverinta dela recensamantul evreilor Nr 48331/1942",
+    "Kennort : Berlin-Neukölln Kennummer : A 011790 Gültig bis 14. Februar "
+    "1944 Name Kittel Vornamen Ruth Sara Geburtstag 21. Juli 1927 "
+    "Geburtsort Berlin Beruf Schülerin Berlin-Neukölln , den 14. Februar "
+    "1939 Der Polizeipräsident in Berlin 214. Polizeirevier",
+    "Kennort : Leipzig Kennummer : A 00778 Gültig bis 14. Februar 1944 "
+    "Name Bergmann geb. Frankenberg Vornamen Ruth Sara Geburtstag 14. "
+    "November 1905 Geburtsort Leipzig Beruf ohne Bemerkungen : keine "
+    "Leipzig , den 15. Feb. 1939 Der Polizeipräsident zu Leipzig",
+    "Kennort : Leipzig Kennummer : A 00048 Gültig bis 16. Januar 1944 Name "
+    "Dr. med. Bergmann Vornamen Walter Manfred Israel Geburtstag 12. "
+    "Oktober 1907 Geburtsort Leipzig Beruf Ärztlicher Behandler "
+    "Bemerkungen : keine Leipzig , den 17. Jan. 1939",
+    "Kennort : Bamberg Kennummer : A 00210 Gültig bis 14. Februar 1944 Name "
+    "Jacobsohn geb. Simon Vornamen Margarete Sara Geburtstag 6 Januar 1908 "
+    "Geburtsort Insterburg Beruf ohne Bemerkungen : keine Bamberg , den 14. "
+    "Februar 1939 Der Oberbürgermeister",
+    "Gültig im Reich ! Name Mytka Vorname Roman-Paul Beruf der Mönch "
+    "Geburtsdatum 28. III. 1925 Geburtsort Szistka Bekenntnis gr.-kath. "
+    "Familienstand ledig Heimatanschrift Osmoloda Studitenkloster Der "
+    "Inhaber dieses Ausweises ist ukrainischer Volkszugehöriger . Dolina , "
+    "den 3. August 1943",
+    "Postausweiskarte Nr. 2114 Carte d'identité gültig bis zum 13. November "
+    "1941 Name : Okonski Vornamen : Sara Pauline Beruf : Büroangestellte "
+    "Wohnort : Berlin W Münchener Str. 19 Ausgestellt von dem Postamt "
+    "Berlin 30 am 14. 11. 1938",
+    "Départ. ALPES MARITIMES Ville Cannes NOM DREYFUS Prénoms Yvonne Date et "
+    "lieu de naissance 21 Déc. 1890 PARIS 9e Seine Profession SANS Adresse "
+    "Villa Eldée . La Croisette . Cannes . A Nice , le 30 DEC 1947",
+    "Name WAJNER Vorname SIMA Geburtsdatum 12. VI. 1919 Geburtsort WILNO "
+    "Beruf MODISTIN War in KZ. STUT-HOF Bemerkungen INDEX 115554 "
+    "Heidenheim , den 23. 1. 1947",
+]
+
+# Excerpts of the cards above with one word misspelled the way OCR does
+# (dropped umlauts, l for i, missing letters), and the misspelled words
+MISSPELLED_CARD_TEXTS = [
+    (
+        "Name Wajner Vorname Sima Geburtsort Wilno Beruf Modistin Indx 115554",
+        ["Indx"],
+    ),
+    (
+        "Name Dreyfus Prenoms Yvonne Profesion sans Adresse Villa Eldee",
+        ["Profesion"],
+    ),
+    (
+        "Name Bergmann Vornamen Walter Manfred Geburtsort Leipzlg Beruf Arzt",
+        ["Leipzlg"],
+    ),
+    (
+        "Name Jacobsohn geb Simon Vornamen Margarete Sara Bemerkungen kelne",
+        ["kelne"],
+    ),
+    (
+        "Name Mytka Vorname Roman Paul Geburtsort Szistka Familienstand ledlg",
+        ["ledlg"],
+    ),
+    (
+        "Carte de identitate Evreul Engler Baruch strada Miron Costln",
+        ["Costln"],
+    ),
+    (
+        "Postausweiskarte Name Okonski Vornamen Sara Pauline Wohnort Berln",
+        ["Berln"],
+    ),
+    (
+        "Name Kittel Vornamen Ruth Sara Geburtstag 21 Jull 1927 Beruf",
+        ["Jull"],
+    ),
+]
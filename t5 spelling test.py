@@ -1,27 +1,168 @@
-from transformers import T5Tokenizer, T5ForConditionalGeneration
-
-tokenizer = T5Tokenizer.from_pretrained("t5-base")
-model = T5ForConditionalGeneration.from_pretrained("t5-base")
+import argparse
+import time
+from collections import OrderedDict
+import torch
+from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+from quantize import compare_models, load_quantized, print_comparison
+from sample_cards import CARD_TEXTS
+
+# Fields extracted from every card, with the question asked for each
+QUESTIONS = {
+    "spouse": "What is the name of the spouse?",
+    "birthplace": "Where was the person born?",
+    "nationality": "What is the nationality?",
+}
+
+# Generated outputs kept in memory, at most (least recently used go first)
+CACHE_SIZE = 4096
+
+class T5Extractor:
+    """
+    Asks T5 every (card, question) pair in padded batches, then
+    translates the answers in a second batched pass.
+
+    T5's encoder reads the question and the context together, so a
+    context encoded on its own cannot be reused for another question
+    without changing the answers. Instead, identical inputs (the same
+    question on the same OCR text, or the same answer to translate) are
+    only run once: outputs are cached by input text, keeping the
+    cache_size most recently used.
+
+    quantized=True uses the int8 version of the model.
+    """
+
+    def __init__(self, model_name="t5-base", batch_size=16, num_threads=None, max_new_tokens=32, quantized=False, cache_size=CACHE_SIZE):
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        if quantized:
+            # Int8 weights for CPU inference, built once and cached locally
+            self.model = load_quantized(model_name, "seq2seq", AutoModelForSeq2SeqLM)
+        else:
+            self.model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        self.model.eval()
+        self.batch_size = batch_size
+        self.max_new_tokens = max_new_tokens
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+
+    def generate(self, inputs):
+        """Generate an output for each input text, in padded batches."""
+        results = {}
+        for text in inputs:
+            if text in self.cache:
+                self.cache.move_to_end(text)
+                results[text] = self.cache[text]
+
+        # Only run inputs not seen before, similar lengths batched together
+        pending = sorted({text for text in inputs if text not in results}, key=len)
+
+        with torch.inference_mode():
+            for start in range(0, len(pending), self.batch_size):
+                batch = pending[start:start + self.batch_size]
+                encoded = self.tokenizer(batch, padding=True, truncation=True, return_tensors="pt")
+                outputs = self.model.generate(
+                    input_ids=encoded["input_ids"],
+                    attention_mask=encoded["attention_mask"],
+                    max_new_tokens=self.max_new_tokens,
+                )
+                decoded = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+                results.update(zip(batch, decoded))
+                self.cache.update(zip(batch, decoded))
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+
+        return [results[text] for text in inputs]
+
+    def extract(self, contexts, questions=QUESTIONS, translate=True):
+        """
+        Answer every question for every context. Returns one dictionary
+        per context, mapping field -> answer (translated to English).
+        """
+        fields = list(questions)
+        inputs = [
+            f"question answering: \ncontext: {context} \nquestion: {questions[field]}"
+            for context in contexts
+            for field in fields
+        ]
+        answers = self.generate(inputs)
+        if translate:
+            answers = self.generate([f"translate german to english: {answer}" for answer in answers])
+
+        return [
+            dict(zip(fields, answers[i:i + len(fields)]))
+            for i in range(0, len(answers), len(fields))
+        ]
+
+def compare_quantized(contexts, model_name="t5-base", repeats=3):
+    """
+    Compare the answers and speed of the float and int8 models on the
+    contexts, with the match rate of each field.
+    """
+    float_extractor = T5Extractor(model_name)
+    int8_extractor = T5Extractor(model_name, quantized=True)
+
+    def answers(extractor):
+        def run(contexts):
+            # Start cold every time so the cache does not hide the model
+            extractor.cache.clear()
+            return [card[field] for card in extractor.extract(contexts) for field in QUESTIONS]
+        return run
+
+    results = compare_models(
+        float_extractor.model, answers(float_extractor),
+        int8_extractor.model, answers(int8_extractor),
+        contexts, repeats,
+    )
+    print(f"{len(contexts)} cards")
+    print_comparison(results)
+
+    # Answers are flattened card by card, in QUESTIONS order
+    fields = list(QUESTIONS)
+    pairs = list(zip(results["outputs"]["float"], results["outputs"]["int8"]))
+    results["field_agreement"] = {}
+    for i, field in enumerate(fields):
+        field_pairs = pairs[i::len(fields)]
+        rate = sum(a == b for a, b in field_pairs) / max(len(field_pairs), 1)
+        results["field_agreement"][field] = rate
+        print(f"{field:>12}: {rate:.1%} match")
+    return results
+
+_extractor = None
 
 def ask_T5(input_text):
-    input_ids = tokenizer.encode(input_text, return_tensors="pt")
-
-    outputs = model.generate(input_ids)
-    result = tokenizer.decode(outputs[0], skip_special_tokens=True)
-    return result
-
-
-print()
-# print(ask_T5("translate English to German: Hello World"))
-result = ask_T5(
-    """question answering: 
-context: T / D 410 029 Name : LISCHNER Eva ge . SKOWRONEK verw . GEFEN BD : 14.11.191 . Warschau / Polen Nat : isr./poln; Sept. 39 Ende 1940 ZAL . Warschau Ende 40 Apr. 43 Gh . Warschau 8 5. 1945 bei Warschau befreit 
-question: What is the name of the spouse?"""
-)
-
-print(ask_T5(
-    f"translate german to english: {result}"
-))
+    global _extractor
+    if _extractor is None:
+        _extractor = T5Extractor()
+    return _extractor.generate([input_text])[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="T5 card field extraction")
+    parser.add_argument("--model", default="t5-base")
+    parser.add_argument("--threads", type=int, default=None, help="CPU threads used by torch")
+    parser.add_argument("--quantized", action="store_true", help="use the int8 model (CPU)")
+    parser.add_argument("--compare-quantized", action="store_true", help="benchmark the int8 model against the float one")
+    args = parser.parse_args()
+
+    context = "T / D 410 029 Name : LISCHNER Eva ge . SKOWRONEK verw . GEFEN BD : 14.11.191 . Warschau / Polen Nat : isr./poln; Sept. 39 Ende 1940 ZAL . Warschau Ende 40 Apr. 43 Gh . Warschau 8 5. 1945 bei Warschau befreit"
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    if args.compare_quantized:
+        compare_quantized(CARD_TEXTS, args.model)
+        raise SystemExit
+
+    extractor = T5Extractor(args.model, quantized=args.quantized)
+    print()
+    # print(ask_T5("translate English to German: Hello World"))
+    print(extractor.extract([context])[0])
+
+    # Measure throughput on distinct cards, so none come from the cache
+    extractor.cache.clear()
+    start = time.perf_counter()
+    extractor.extract(CARD_TEXTS)
+    print(f"\nThroughput: {len(CARD_TEXTS) / (time.perf_counter() - start):.2f} cards/s")
 
 
 
@@ -0,0 +1,206 @@
+import json
+import os
+import shutil
+import time
+from typing import Dict, List
+
+import pandas as pd
+
+from anomaly import AnomalyTable, read_anomaly_report
+from data_cache import (
+    cache_file,
+    fingerprint,
+    fingerprint_matches,
+    load_table,
+)
+
+DATA_FILE = "data.xlsx"
+REPORT_FILE = "anomaly_report.xlsx"
+SUGGESTIONS_FILE = "suggestions.xlsx"
+
+# Tables stored in the bundle, one uncompressed Feather file each
+BUNDLE_TABLES = ["records", "td_index", "anomalies", "suggestions"]
+
+# Bumped when the bundle layout changes, so old bundles are rebuilt
+BUNDLE_VERSION = 1
+
+
+class ViewerSession:
+    """
+    Everything RecordViewer needs at startup: the record table, the TD
+    index (TD -> row of its first record), the anomalies grouped by TD,
+    the TDs to review and the suggestions.
+    """
+
+    def __init__(
+        self,
+        records: pd.DataFrame,
+        td_index: pd.DataFrame,
+        anomalies: AnomalyTable,
+        suggestions: pd.DataFrame,
+    ):
+        self.records = records
+        self.td_index = td_index
+        self.anomalies_by_td = anomalies
+        self.suggestions = suggestions
+        self.row_by_td: Dict[str, int] = dict(
+            zip(td_index["TD"].tolist(), td_index["row"].tolist())
+        )
+        # TDs with anomalies that exist in the data, in report order
+        self.td_list: List[str] = [
+            td for td in anomalies.keys() if td in self.row_by_td
+        ]
+
+    @classmethod
+    def build(
+        cls,
+        data_file: str = DATA_FILE,
+        report_file: str = REPORT_FILE,
+        suggestions_file: str = SUGGESTIONS_FILE,
+    ) -> "ViewerSession":
+        """Prepare the session from the source files."""
+        records = load_table(data_file)
+        # Clean column names by stripping whitespace
+        records.columns = records.columns.str.strip()
+        records["TD"] = records["TD"].map(str)
+
+        report = read_anomaly_report(report_file)
+        anomalies = AnomalyTable.from_report(report)
+
+        # Index the data by TD: row position of each TD's first record
+        first_rows = ~records["TD"].duplicated()
+        td_index = pd.DataFrame(
+            {
+                "TD": records["TD"][first_rows].to_numpy(dtype=object),
+                "row": first_rows.to_numpy().nonzero()[0],
+            }
+        )
+
+        suggestions = load_table(suggestions_file)
+        return cls(records, td_index, anomalies, suggestions)
+
+
+def bundle_dir(data_file: str = DATA_FILE) -> str:
+    """The bundle lives in the data cache, next to the data file."""
+    return cache_file(data_file, ".session")
+
+
+def load_session(
+    data_file: str = DATA_FILE,
+    report_file: str = REPORT_FILE,
+    suggestions_file: str = SUGGESTIONS_FILE,
+) -> ViewerSession:
+    """
+    Open the session bundle, memory-mapping its tables. The bundle is
+    rebuilt first when it is missing or any source file has changed.
+    Without pyarrow the session is built from the sources every time.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return ViewerSession.build(data_file, report_file, suggestions_file)
+
+    sources = [data_file, report_file, suggestions_file]
+    directory = bundle_dir(data_file)
+    if not _bundle_is_current(directory, sources):
+        write_bundle(
+            ViewerSession.build(data_file, report_file, suggestions_file),
+            directory,
+            sources,
+        )
+    return read_bundle(directory)
+
+
+def write_bundle(session: ViewerSession, directory: str, sources: List[str]):
+    from pyarrow import feather
+
+    print(f"Building viewer session bundle in '{directory}'...")
+    tables = {
+        "records": session.records,
+        "td_index": session.td_index,
+        "anomalies": session.anomalies_by_td.frame,
+        "suggestions": session.suggestions,
+    }
+
+    # Write the new bundle beside the old one, then swap it in
+    tmp_dir = directory + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name in BUNDLE_TABLES:
+        # Uncompressed so the viewer can memory-map the tables
+        feather.write_feather(
+            tables[name],
+            os.path.join(tmp_dir, f"{name}.feather"),
+            compression="uncompressed",
+        )
+
+    meta = {
+        "version": BUNDLE_VERSION,
+        "sources": {
+            os.path.abspath(path): fingerprint(path) for path in sources
+        },
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp_dir, directory)
+
+
+def read_bundle(directory: str) -> ViewerSession:
+    from pyarrow import feather
+
+    tables = {
+        name: feather.read_table(
+            os.path.join(directory, f"{name}.feather"), memory_map=True
+        ).to_pandas()
+        for name in BUNDLE_TABLES
+    }
+    return ViewerSession(
+        tables["records"],
+        tables["td_index"],
+        AnomalyTable(tables["anomalies"]),
+        tables["suggestions"],
+    )
+
+
+def _bundle_is_current(directory: str, sources: List[str]) -> bool:
+    meta_path = os.path.join(directory, "meta.json")
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if meta.get("version") != BUNDLE_VERSION:
+        return False
+
+    stored = meta.get("sources", {})
+    if set(stored) != {os.path.abspath(path) for path in sources}:
+        return False
+
+    before = json.dumps(stored, sort_keys=True)
+    for path in sources:
+        if not fingerprint_matches(path, stored[os.path.abspath(path)]):
+            return False
+    if json.dumps(stored, sort_keys=True) != before:
+        # Touched but unchanged sources: remember their new mtimes
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+    return True
+
+
+def main():
+    # Prepare the bundle ahead of time, so the viewer opens quickly
+    start = time.perf_counter()
+    session = load_session()
+    elapsed = time.perf_counter() - start
+    print(
+        f"Viewer session ready in {elapsed:.2f}s: "
+        f"{len(session.records)} records, "
+        f"{len(session.td_list)} TDs to review, "
+        f"{session.anomalies_by_td.n_anomalies} anomalies"
+    )
+
+
+if __name__ == "__main__":
+    main()